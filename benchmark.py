@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""Benchmark every target in-process.
+
+Each target is run against synthetic theme sets of increasing size and
+against synthetic templates of increasing size. Per-stage timings and peak
+memory are saved as JSON so results can be compared between commits.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import build
+import config
+import metadata
+from targets import get_target
+from tokens import updated
+from variants import hue_rotated
+
+STAGES = ("config_load", "label_resolution", "template_parse", "render", "serialize", "write")
+VARIANT_COUNTS = (4, 100, 1000, 10000)
+TEMPLATE_SCALES = (1, 4, 16)
+TEMPLATE_SCALE_VARIANTS = 100
+RESULTS_DIR = os.path.join(build.CACHE_DIR, "bench")
+
+
+class StageTimer:
+    """Accumulate wall time per build stage."""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    @contextmanager
+    def __call__(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[stage] += time.perf_counter() - started
+
+
+def synthetic_themes(count):
+    """`count` theme dicts derived from the real themes by rotating hues."""
+    themes = config.themes
+    rounds = -(-count // len(themes))
+    return [
+        updated(
+            hue_rotated(themes[i % len(themes)], (i // len(themes)) * 360.0 / rounds),
+            {"name": f"{themes[i % len(themes)]['name']} {i}"},
+        )
+        for i in range(count)
+    ]
+
+
+def scale_template(template, scale):
+    """Grow a template by repeating string entries of its objects and items of its lists."""
+    if scale == 1:
+        return template
+    if isinstance(template, dict):
+        scaled = {key: scale_template(value, scale) for key, value in template.items()}
+        for copy in range(1, scale):
+            for key, value in template.items():
+                if isinstance(value, str) and "{" in value:
+                    scaled[f"{key}~{copy}"] = value
+        return scaled
+    if isinstance(template, list) and template and all(isinstance(item, dict) for item in template):
+        return [scale_template(item, scale) for item in template] * scale
+    return template
+
+
+def load_json(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def run_target(target, theme_dicts, template_json, output_dir):
+    """Build one target for `theme_dicts`, returning per-stage timings."""
+    timer = StageTimer()
+    plugin = get_target(target)
+
+    with timer("config_load"):
+        importlib.reload(config)
+
+    with timer("label_resolution"):
+        metadata._label_indexes.clear()
+        labels = [metadata.get_theme_label(metadata.PACKAGE_JSON, theme_dict["name"]) for theme_dict in theme_dicts]
+
+    compiled = None
+    if template_json is not None:
+        template_path = os.path.join(output_dir, "template.json")
+        with open(template_path, "w") as f:
+            f.write(template_json)
+        with timer("template_parse"):
+            compiled = plugin.load_template(template_path)
+
+    def render(theme_dict, label):
+        with timer("render"):
+            return plugin.render(plugin.sources(theme_dict, label), label, compiled)
+
+    if plugin.bundle is not None:
+        started = time.perf_counter()
+        text = plugin.render_bundle(render(theme_dict, label) for theme_dict, label in zip(theme_dicts, labels))
+        timer.totals["serialize"] += time.perf_counter() - started - timer.totals["render"]
+        with timer("write"):
+            with open(os.path.join(output_dir, plugin.bundle), "wb") as f:
+                f.write(text.encode())
+        return timer.totals
+
+    for i, (theme_dict, label) in enumerate(zip(theme_dicts, labels)):
+        text = render(theme_dict, label)
+        with timer("serialize"):
+            data = text.encode()
+        with timer("write"):
+            with open(os.path.join(output_dir, f"{target}-{i}"), "wb") as f:
+                f.write(data)
+    return timer.totals
+
+
+def measure(target, theme_dicts, template_json):
+    """Time a run, then repeat it under tracemalloc for peak memory."""
+    with tempfile.TemporaryDirectory() as output_dir:
+        stages = run_target(target, theme_dicts, template_json, output_dir)
+    with tempfile.TemporaryDirectory() as output_dir:
+        tracemalloc.start()
+        try:
+            run_target(target, theme_dicts, template_json, output_dir)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {"stages": stages, "total": sum(stages.values()), "peak_memory": peak}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=build.ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(targets, variant_counts, template_scales):
+    templates = {
+        target: load_json(get_target(target).template) for target in targets if get_target(target).template is not None
+    }
+    cases = [(count, 1) for count in variant_counts]
+    cases += [(TEMPLATE_SCALE_VARIANTS, scale) for scale in template_scales if scale != 1]
+
+    results = []
+    for count, scale in cases:
+        theme_dicts = synthetic_themes(count)
+        for target in targets:
+            if scale != 1 and target not in templates:
+                continue
+            template_json = json.dumps(scale_template(templates[target], scale)) if target in templates else None
+            result = {"target": target, "variants": count, "template_scale": scale, **measure(target, theme_dicts, template_json)}
+            results.append(result)
+            print(
+                f"{target:8} variants={count:<6} template x{scale:<3} "
+                f"total={result['total'] * 1000:9.1f} ms  peak={result['peak_memory'] / 1e6:7.1f} MB  "
+                + " ".join(f"{stage}={seconds * 1000:.1f}" for stage, seconds in result["stages"].items())
+            )
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(report, baseline):
+    """Print the total time and peak memory of each case relative to a baseline report."""
+    def key(result):
+        return result["target"], result["variants"], result["template_scale"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    print(f"\nCompared to {baseline.get('revision')}:")
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if old is None or not old["total"]:
+            continue
+        print(
+            f"{result['target']:8} variants={result['variants']:<6} template x{result['template_scale']:<3} "
+            f"time {result['total'] / old['total']:6.2f}x  memory {result['peak_memory'] / max(old['peak_memory'], 1):6.2f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("targets", nargs="*", metavar="target", help="targets to benchmark (default: all)")
+    parser.add_argument("--variants", default=",".join(map(str, VARIANT_COUNTS)),
+                        help="comma-separated synthetic theme set sizes")
+    parser.add_argument("--template-scales", default=",".join(map(str, TEMPLATE_SCALES)),
+                        help=f"comma-separated template size multipliers (run with {TEMPLATE_SCALE_VARIANTS} variants)")
+    parser.add_argument("-o", "--output", help=f"results file (default: {os.path.relpath(RESULTS_DIR)}/<revision>.json)")
+    parser.add_argument("--compare", metavar="RESULTS", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+    for target in args.targets:
+        if target not in build.TARGETS:
+            parser.error(f"unknown target {target!r}")
+
+    targets = [target for target in build.TARGETS if target in args.targets] if args.targets else list(build.TARGETS)
+    report = run(
+        targets,
+        [int(count) for count in args.variants.split(",")],
+        [int(scale) for scale in args.template_scales.split(",")],
+    )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['revision'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved: {output}")
+
+    if args.compare:
+        compare(report, load_json(args.compare))
+
+
+if __name__ == "__main__":
+    main()
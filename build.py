@@ -0,0 +1,572 @@
+#!/usr/bin/env python3
+"""Build every target's themes in one process.
+
+Config, theme labels and templates are loaded once, then the
+target x variant jobs are fanned out across a worker pool. Jobs whose
+inputs are unchanged since the last build (see .build-cache/) are skipped.
+Themes are checked for legible contrast first (see vscode/src/contrast.py).
+"""
+
+import argparse
+import cProfile
+import importlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Right after the entry this module was found through: ahead of it,
+# vscode/src/build.py would shadow this module for scripts importing it and
+# in their spawned workers, and last, installed modules would shadow the
+# repository's
+_root_entries = [i for i, entry in enumerate(sys.path) if os.path.abspath(entry or ".") == ROOT]
+sys.path.insert(_root_entries[0] + 1 if _root_entries else 1, os.path.join(ROOT, "vscode/src"))
+
+from config import themes
+from manifest import BuildManifest, RecordingMapping, digest_bytes, digest_file
+from metadata import PACKAGE_JSON, get_theme_label
+from output import ChangedFile, OutputWriter, write_if_changed
+from scopes import ScopeResolver, format_dead_selector
+from targets import get_target, names, reload_targets, source_path
+from template import MissingKeysError
+from tracing import add_arguments, drain, enable, span, write_trace
+from tracing import enabled as tracing_enabled
+from variants import parse_range, sweep
+from watcher import file_watcher
+
+TARGETS = names()
+CONFIG = os.path.join(ROOT, "vscode/src/config.py")
+SHARED_SRC = os.path.join(ROOT, "vscode/src")
+CACHE_DIR = os.path.join(ROOT, ".build-cache")
+MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+VARIANTS_DIR = os.path.join(ROOT, "variants")
+# Sweep variants are contrast-checked this many at a time
+CHECK_CHUNK = 256
+
+_context = None
+
+
+class BuildError(Exception):
+    pass
+
+
+def load_labels(package_json_path):
+    """Resolve the package.json label of every theme."""
+    return {theme_dict["name"]: get_theme_label(package_json_path, theme_dict["name"]) for theme_dict in themes}
+
+
+def code_files():
+    """The builder's own code: this module and every module under vscode/src but config.py."""
+    files = [os.path.abspath(__file__)]
+    for directory, _, filenames in sorted(os.walk(SHARED_SRC)):
+        files += [os.path.join(directory, filename) for filename in sorted(filenames)
+                  if filename.endswith(".py") and os.path.join(directory, filename) != CONFIG]
+    return files
+
+
+def code_digest():
+    """Digest of code_files(), which every output and check depends on."""
+    return digest_bytes(*(digest_file(path) for path in code_files()))
+
+
+def load_target_context(context, target):
+    """Compile a target's template and digest the builder code, its module and template."""
+    plugin = get_target(target)
+    static = [context["code"], digest_file(source_path(target))]
+    if plugin.template is not None:
+        static.append(digest_file(plugin.template))
+    if target in context["combine"]:
+        # Combined targets cache their outputs instead of writing them
+        static.append(json.dumps(context["combine"][target], sort_keys=True))
+    context["static"][target] = static
+    context["templates"][target] = plugin.load_template()
+
+
+def load_context(targets, combine=None):
+    """Load everything the jobs share: labels, compiled templates, source digests.
+
+    `combine` maps targets to write combined (see Target) to their combine
+    options.
+    """
+    combine = {target: options for target, options in (combine or {}).items() if get_target(target).combine}
+    context = {"labels": load_labels(PACKAGE_JSON), "code": code_digest(), "templates": {}, "static": {},
+               "combine": combine}
+    for target in targets:
+        load_target_context(context, target)
+    return context
+
+
+def reload_config():
+    """Re-import config.py and the targets that captured its colors."""
+    global themes
+    themes = importlib.reload(sys.modules["config"]).themes
+    reload_targets()
+
+
+def contrast_violations(theme_dicts):
+    """Check theme_dicts against the contrast thresholds in one batch.
+
+    Returns None when NumPy is not installed and the check cannot run.
+    """
+    try:
+        from contrast import check_contrast
+    except ImportError:
+        return None
+    with span("check_contrast"):
+        return check_contrast(theme_dicts)
+
+
+def check_themes(theme_dicts):
+    """Raise BuildError if any theme fails the contrast thresholds.
+
+    Returns whether the check ran, which needs NumPy.
+    """
+    violations = contrast_violations(theme_dicts)
+    if violations is None:
+        print("NumPy not installed; skipping contrast checks")
+        return False
+    if violations:
+        from contrast import format_violation
+        lines = "\n".join(f"  {format_violation(violation)}" for violation in violations)
+        raise BuildError(f"{len(violations)} contrast violations:\n{lines}")
+    return True
+
+
+def themes_digest(theme_dicts, code):
+    """Digest of every theme value and the `code` digest, to skip unchanged checks."""
+    return digest_bytes(code, json.dumps([sorted(t.items()) for t in theme_dicts], default=str))
+
+
+def check_templates(context, targets):
+    """Raise BuildError listing every template key missing from any theme.
+
+    Only the VS Code template is checked: the Zed builder warns about
+    missing keys and leaves the affected strings unformatted.
+    """
+    if "vscode" not in targets:
+        return
+    template = context["templates"]["vscode"]
+    errors = []
+    for theme_dict in themes:
+        missing = template.missing_keys(theme_dict)
+        if missing:
+            errors.append(f"  {theme_dict['name']}: {MissingKeysError(missing)}")
+    if errors:
+        raise BuildError("missing template keys:\n" + "\n".join(errors))
+
+
+def check_token_colors(targets):
+    """Warn about VS Code tokenColors rules that color nothing (see vscode/src/scopes.py).
+
+    Checked on the template, since which rules win does not depend on the
+    theme's colors.
+    """
+    if "vscode" not in targets:
+        return
+    with open(get_target("vscode").template, "r") as f:
+        rules = json.load(f).get("tokenColors", [])
+    for dead_selector in ScopeResolver(rules).dead_selectors():
+        print(f"Warning: tokenColors {format_dead_selector(rules, dead_selector)}")
+
+
+def init_worker(context):
+    global _context
+    _context = context
+    if context.get("trace"):
+        enable()
+
+
+def job_theme(target, index):
+    extra = get_target(target).extras.get(index)
+    return themes[index] if extra is None else themes[extra[0]]
+
+
+def job_label(target, index):
+    extra = get_target(target).extras.get(index)
+    return _context["labels"][themes[index]["name"]] if extra is None else extra[1]
+
+
+def job_sources(target, index):
+    """The mappings a job reads its colors from."""
+    return get_target(target).sources(job_theme(target, index), job_label(target, index))
+
+
+def job_static_digest(target, index):
+    return digest_bytes(*_context["static"][target], job_label(target, index))
+
+
+def fragment_path(target, index):
+    """Where a bundled or combined target caches one rendered variant."""
+    return os.path.join(CACHE_DIR, target, f"{index}{get_target(target).suffix}")
+
+
+def read_text(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+def build_output(target, index, sources):
+    """Render one theme of a target and write it if it changed."""
+    plugin = get_target(target)
+    extra = plugin.extras.get(index)
+    options = {} if extra is None else extra[3]
+    label, template = job_label(target, index), _context["templates"][target]
+    if plugin.bundle is not None or target in _context["combine"]:
+        with span("render"):
+            text = plugin.render(sources, label, template, **options)
+        # Cache the rendered variant; the bundle or combined files are assembled from the cache
+        output_path = fragment_path(target, index)
+        with span("write"):
+            write_if_changed(output_path, text)
+        return themes[index]["name"], [output_path]
+
+    output_name = plugin.output_filename(themes[index]["name"]) if extra is None else extra[2]
+    with span("render"):
+        rendered = list(plugin.render_outputs(sources, label, template, output_name, **options))
+    outputs = [os.path.join(ROOT, plugin.output_dir, name) for name, _ in rendered]
+    with span("write"):
+        for path, (_, text) in zip(outputs, rendered):
+            write_if_changed(path, text)
+    return output_name, outputs
+
+
+def run_job(target, index):
+    """Run one job, recording which keys it reads from its sources.
+
+    Also returns the job's trace events, and dumps its profile into the
+    context's profile directory when profiling.
+    """
+    started = time.perf_counter()
+    profile = cProfile.Profile() if _context.get("profile_dir") else None
+    with span(target, cat="target", variant=job_theme(target, index)["name"]):
+        sources = {name: RecordingMapping(mapping) for name, mapping in job_sources(target, index).items()}
+        if profile is not None:
+            output_name, outputs = profile.runcall(build_output, target, index, sources)
+            profile.dump_stats(os.path.join(_context["profile_dir"], f"{target}-{index}.prof"))
+        else:
+            output_name, outputs = build_output(target, index, sources)
+    keys = {name: source.keys_read for name, source in sources.items()}
+    return output_name, outputs, keys, time.perf_counter() - started, drain()
+
+
+def list_jobs(targets):
+    """List the (target, variant) jobs of a build."""
+    jobs = []
+    for target in targets:
+        jobs += [(target, index) for index in range(len(themes))]
+        jobs += [(target, index) for index in get_target(target).extras]
+    return jobs
+
+
+def run_jobs(jobs, workers, threads, context):
+    """Yield ((target, index), result) for each job as it finishes.
+
+    Jobs run in a process or thread pool, or inline if `workers` is 0.
+    """
+    if not jobs:
+        return
+    if workers == 0:
+        for job in jobs:
+            yield job, run_job(*job)
+        return
+
+    # Imported here, like NumPy, so that no-op builds start quickly
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+    executor_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor_class(max_workers=workers, initializer=init_worker, initargs=(context,)) as executor:
+        futures = {executor.submit(run_job, target, index): (target, index) for target, index in jobs}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def build(targets=TARGETS, workers=None, threads=False, force=False, profile=None, trace=None, check=True,
+          combine=None):
+    """Build the given targets, printing each job as it finishes.
+
+    Jobs whose inputs and outputs match the build manifest are skipped
+    unless `force` is set. Targets in `combine` are written combined, with
+    the options it maps them to; see load_context(). `profile` and `trace`
+    name files to write a cProfile dump (merged across workers) and a
+    Chrome trace timeline to.
+    Unless `check` is false, raises BuildError before building anything if
+    a theme fails the contrast check.
+    """
+    if trace:
+        enable()
+
+    if profile:
+        with tempfile.TemporaryDirectory() as profile_dir:
+            main_profile = cProfile.Profile()
+            events = main_profile.runcall(_build, targets, workers, threads, force, profile_dir, check=check,
+                                          combine=combine)
+            import pstats
+            stats = pstats.Stats(main_profile)
+            for filename in sorted(os.listdir(profile_dir)):
+                stats.add(os.path.join(profile_dir, filename))
+            os.makedirs(os.path.dirname(os.path.abspath(profile)), exist_ok=True)
+            stats.dump_stats(profile)
+        print(f"Profile: {profile}")
+    else:
+        events = _build(targets, workers, threads, force, None, check=check, combine=combine)
+
+    if trace:
+        write_trace(trace, events + drain())
+        print(f"Trace: {trace}")
+
+
+def _build(targets, workers, threads, force, profile_dir, context=None, check=True, combine=None):
+    """Run a build, returning the trace events collected from the workers.
+
+    With `workers` set to 0 the jobs run inline, in this process. A
+    preloaded `context` may be passed in to avoid reloading it.
+    """
+    started = time.perf_counter()
+    events = []
+    manifest = BuildManifest(MANIFEST)
+    if context is None:
+        with span("load_context"):
+            context = load_context(targets, combine)
+    if check:
+        checked = themes_digest(themes, context["code"])
+        if force or not manifest.is_checked("contrast", checked):
+            if check_themes(themes):
+                manifest.record_check("contrast", checked)
+    check_templates(context, targets)
+    check_token_colors(targets)
+    context["profile_dir"] = profile_dir
+    context["trace"] = tracing_enabled()
+    init_worker(context)
+    for target in targets:
+        plugin = get_target(target)
+        if plugin.prepare is not None:
+            plugin.prepare()
+        os.makedirs(os.path.join(ROOT, plugin.output_dir), exist_ok=True)
+        if plugin.bundle or target in context["combine"]:
+            os.makedirs(os.path.join(CACHE_DIR, target), exist_ok=True)
+
+    jobs = []
+    with span("check_manifest"):
+        for target, index in list_jobs(targets):
+            job_id = f"{target}/{index}"
+            if not force and manifest.is_fresh(job_id, job_static_digest(target, index), job_sources(target, index)):
+                continue
+            jobs.append((target, index))
+
+    for done, ((target, index), result) in enumerate(run_jobs(jobs, workers, threads, context), 1):
+        output_name, outputs, keys, elapsed, job_events = result
+        events.extend(job_events)
+        manifest.record(f"{target}/{index}", job_static_digest(target, index), job_sources(target, index), keys, outputs)
+        print(f"[{done}/{len(jobs)}] {target}: {output_name} ({elapsed * 1000:.1f} ms)")
+
+    for target, options in context["combine"].items():
+        if target in targets:
+            write_combined(target, options)
+
+    for target in targets:
+        plugin = get_target(target)
+        if plugin.bundle is None:
+            continue
+        # Stream the bundle from the cached variants, one at a time
+        bundle = ChangedFile(os.path.join(ROOT, plugin.output_dir, plugin.bundle))
+        with span(f"{target} bundle", cat="target"), bundle as f:
+            plugin.write_bundle(f, (read_text(fragment_path(target, i)) for i in range(len(themes))))
+        if bundle.changed:
+            print(f"{target}: {plugin.bundle} with {len(themes)} theme variants")
+
+    manifest.save()
+    skipped = len(list_jobs(targets)) - len(jobs)
+    print(f"Built {len(jobs)} jobs ({skipped} up to date) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return events
+
+
+def write_combined(target, options):
+    """Write a combined target's files from its cached variants."""
+    plugin = get_target(target)
+    outputs = [(plugin.output_filename(theme_dict["name"]), read_text(fragment_path(target, i)))
+               for i, theme_dict in enumerate(themes)]
+    with span(f"{target} combine", cat="target"):
+        combined = plugin.combine(outputs, **options)
+    for name, text in combined:
+        if write_if_changed(os.path.join(ROOT, plugin.output_dir, name), text):
+            print(f"{target}: {name}")
+
+
+def watched_files(targets):
+    """Map each file a build depends on to what changing it invalidates."""
+    files = {CONFIG: "config", PACKAGE_JSON: "labels"}
+    for target in targets:
+        files[source_path(target)] = "code"
+        template = get_target(target).template
+        if template is not None:
+            files[template] = target
+    for path in code_files():
+        if path not in files:
+            files[path] = "code"
+    # Keyed the way the watchers report paths
+    return {os.path.abspath(path): kind for path, kind in files.items()}
+
+
+def watch(targets=TARGETS, check=True, combine=None):
+    """Rebuild whenever an input changes, keeping templates and config loaded.
+
+    Config, label and template changes are applied in place and only the
+    jobs whose inputs changed are rebuilt, inline. Changes to target code
+    restart the process, and so do lost file events, after which every
+    file counts as changed.
+    """
+    context = load_context(targets, combine)
+    try:
+        _build(targets, 0, False, False, None, context, check)
+    except BuildError as e:
+        print(f"Build failed: {e}")
+
+    files = watched_files(targets)
+    watcher = file_watcher(files)
+    print(f"Watching {len(files)} files ({type(watcher).__name__})")
+    try:
+        while True:
+            changed = watcher.wait()
+            started = time.perf_counter()
+            print(f"Changed: {', '.join(sorted(os.path.relpath(path, ROOT) for path in changed))}")
+            try:
+                kinds = {files[path] for path in changed}
+                if "code" in kinds:
+                    print("Builder code changed; restarting")
+                    watcher.close()
+                    os.execv(sys.executable, [sys.executable, *sys.argv])
+                if "config" in kinds:
+                    reload_config()
+                if "config" in kinds or "labels" in kinds:
+                    context["labels"] = load_labels(PACKAGE_JSON)
+                for target in targets:
+                    if target in kinds:
+                        load_target_context(context, target)
+                _build(targets, 0, False, False, None, context, check)
+            except BuildError as e:
+                print(f"Build failed: {e}")
+                continue
+            except Exception as e:
+                print(f"Build failed: {type(e).__name__}: {e}")
+                continue
+            print(f"Rebuilt in {(time.perf_counter() - started) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def render_variant(target, theme_dict, output_dir, writer):
+    """Render one generated variant for a target and queue it on `writer`."""
+    plugin = get_target(target)
+    name = theme_dict["name"]
+    # Keep "1.5" and "15" apart in file names
+    output_name = plugin.output_filename(name.replace(".", "p"))
+    template = _context["templates"][target]
+    with span("render"):
+        if plugin.bundle is not None:
+            outputs = [(output_name, plugin.render_file(theme_dict, name, template))]
+        else:
+            outputs = list(plugin.render_outputs(plugin.sources(theme_dict, name), name, template, output_name))
+    for output_name, text in outputs:
+        writer.write(os.path.join(output_dir, output_name), text)
+
+
+def build_variants(variants, targets=TARGETS, output_dir=VARIANTS_DIR, check=True):
+    """Stream generated variants to disk, one variant at a time.
+
+    `variants` may be any iterable of theme dicts, typically a
+    variants.sweep() generator; it is consumed lazily, in chunks of
+    CHECK_CHUNK, so memory use does not grow with the number of variants.
+    Files are written from a thread pool while later variants render.
+    Targets with a `derive` hook derive their tokens for each chunk in bulk.
+    Unless `check` is false, variants failing the contrast check are
+    reported and skipped.
+    """
+    started = time.perf_counter()
+    init_worker(load_context(targets))
+    for target in targets:
+        os.makedirs(os.path.join(output_dir, target), exist_ok=True)
+
+    variants = iter(variants)
+    count = rejected = 0
+    with OutputWriter() as writer:
+        for chunk in iter(lambda: list(itertools.islice(variants, CHECK_CHUNK)), []):
+            violations = contrast_violations(chunk) if check else None
+            failing = {}
+            for violation in violations or ():
+                failing.setdefault(violation[0], violation)
+            passing = []
+            for theme_dict in chunk:
+                name = theme_dict["name"]
+                if name in failing:
+                    from contrast import format_violation
+                    rejected += 1
+                    print(f"Skipped {format_violation(failing[name])}")
+                    continue
+                passing.append(theme_dict)
+            derived = {}
+            for target in targets:
+                derive = get_target(target).derive
+                derived[target] = passing if derive is None else derive(passing)
+            for i, theme_dict in enumerate(passing):
+                count += 1
+                for target in targets:
+                    render_variant(target, derived[target][i], os.path.join(output_dir, target), writer)
+                print(f"[{count}] {theme_dict['name']}")
+    summary = f"Built {count} variants"
+    if rejected:
+        summary += f" ({rejected} failed the contrast check)"
+    print(f"{summary} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("targets", nargs="*", metavar="target",
+                        help=f"targets to build (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("-j", "--jobs", type=int, help="number of workers (default: CPU count)")
+    parser.add_argument("--threads", action="store_true", help="use a thread pool instead of processes")
+    parser.add_argument("-f", "--force", action="store_true", help="rebuild even if outputs are up to date")
+    parser.add_argument("-w", "--watch", action="store_true", help="stay resident and rebuild when inputs change")
+    parser.add_argument("--no-check", dest="check", action="store_false",
+                        help="skip the contrast check (see vscode/src/contrast.py)")
+    parser.add_argument("--include", action="store_true",
+                        help="write the values VS Code themes share to a base theme they include")
+    parser.add_argument("--minify", action="store_true", help="write VS Code themes without whitespace")
+    add_arguments(parser, os.path.join(CACHE_DIR, "build.prof"), os.path.join(CACHE_DIR, "build-trace.json"))
+    sweep_group = parser.add_argument_group("variant sweeps")
+    sweep_group.add_argument("--sweep", metavar="THEME", help="generate variants of THEME instead of the standard themes")
+    sweep_group.add_argument("--hue", default="0", help="hue rotations in degrees, as start:stop:step or a,b,c")
+    sweep_group.add_argument("--contrast", default="1", help="contrast factors, as start:stop:step or a,b,c")
+    sweep_group.add_argument("--background", action="append", metavar="BG1,BG2,BG3",
+                             help="background colors to swap in (repeatable)")
+    sweep_group.add_argument("-o", "--output", default=VARIANTS_DIR, help="output directory for variants")
+    args = parser.parse_args()
+    for target in args.targets:
+        if target not in TARGETS:
+            parser.error(f"unknown target {target!r}")
+
+    targets = [target for target in TARGETS if target in args.targets] if args.targets else list(TARGETS)
+    combine = {"vscode": {"include": args.include, "minify": args.minify}} if args.include or args.minify else None
+    if args.watch:
+        watch(targets, args.check, combine)
+        return
+    if args.sweep is None:
+        try:
+            build(targets, args.jobs, args.threads, args.force, args.profile, args.trace, args.check, combine)
+        except BuildError as e:
+            parser.exit(1, f"Build failed: {e}\n")
+        return
+
+    base = next((theme_dict for theme_dict in themes if theme_dict["name"] == args.sweep), None)
+    if base is None:
+        parser.error(f"unknown theme {args.sweep!r}")
+    backgrounds = [None] + [tuple(background.split(",")) for background in args.background or ()]
+    variants = sweep(base, parse_range(args.hue), parse_range(args.contrast), backgrounds)
+    build_variants(variants, targets, args.output, args.check)
+
+
+if __name__ == "__main__":
+    main()
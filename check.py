@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""Check the build's fast paths against reference versions and its incremental behavior.
+
+    python3 check.py                 # every check
+    python3 check.py scopes --seed 7
+    python3 check.py --list
+
+Each check compares an optimized code path with a straightforward
+reference on the themes and on seeded random inputs, or drives a piece of
+incremental machinery (manifest, watcher, server) through a change in a
+scratch directory. Prints the first failures of each check and exits with
+status 1 if any check fails.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import struct
+import sys
+import tempfile
+import threading
+from collections import ChainMap
+
+import build
+import oklab
+from color import Color
+from config import colors, derived
+from render import ThemeRenderer
+from metadata import PACKAGE_JSON
+from scopes import FIELDS, ScopeResolver, matches_parents, parse_selectors
+from serve import ThemeServer
+from targets import get_target
+from targets.zed import prepare_theme_dict, standard_colors, zed_tokens
+from template import compile_template
+from tokens import TokenGraph, updated
+from variants import sweep
+from watcher import IN_Q_OVERFLOW, InotifyWatcher, PollingWatcher
+
+# Failures printed per check
+MAX_REPORTED = 5
+
+
+def recursive_format(value, theme_dict):
+    """Fill a template the way the builders did before templates were compiled."""
+    if isinstance(value, str):
+        return value.format(**theme_dict)
+    if isinstance(value, list):
+        return [recursive_format(item, theme_dict) for item in value]
+    if isinstance(value, dict):
+        return {key: recursive_format(val, theme_dict) for key, val in value.items()}
+    return value
+
+
+def check_templates(rng, count):
+    """Compiled templates against the original str.format walk, on the themes and sweeps."""
+    theme_dicts = list(build.themes)
+    for theme_dict in build.themes:
+        theme_dicts += sweep(theme_dict, hues=[rng.uniform(0, 360) for _ in range(count // 100 + 1)],
+                             contrasts=(0.8, 1.2))
+    vscode, zed = get_target("vscode"), get_target("zed")
+    with open(vscode.template, "r") as f:
+        vscode_template = json.load(f)
+    with open(zed.template, "r") as f:
+        zed_template = json.load(f)["themes"][0]
+    cases = [
+        ("vscode", vscode_template, lambda theme_dict: theme_dict),
+        ("zed", zed_template, lambda theme_dict: zed.sources(theme_dict, theme_dict["name"])["theme"]),
+    ]
+
+    failures = []
+    for target, template, values in cases:
+        compiled = compile_template(template)
+        for theme_dict in theme_dicts:
+            theme_values = values(theme_dict)
+            expected = json.dumps(recursive_format(template, dict(theme_values)), indent=2)
+            if compiled.render(theme_values) != expected:
+                failures.append(f"{target}: {theme_dict['name']}")
+    return len(cases) * len(theme_dicts), failures
+
+
+def reference_tokens(graph, base):
+    """Every token of `base` under `graph`, each derived from scratch.
+
+    Tokens with a missing input, or depending on themselves, are left out.
+    """
+    def value(name, chain):
+        if name in base or name not in graph.rules:
+            return base[name]
+        if name in chain:
+            raise ValueError(name)
+        inputs, fn = graph.rules[name]
+        return fn(*(value(input_name, chain + (name,)) for input_name in inputs))
+
+    values = dict(base)
+    for name in graph.rules:
+        try:
+            values[name] = value(name, ())
+        except (KeyError, ValueError):
+            pass
+    return values
+
+
+def _items(tokens):
+    """Every token of a Tokens mapping, or the error reading them raised."""
+    try:
+        return dict(tokens.items())
+    except (KeyError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def random_graph(rng, names, base_names):
+    graph = TokenGraph()
+    for name in names:
+        inputs = rng.sample(names + base_names, rng.randint(0, 3))
+        graph.add(name, inputs, lambda *values, name=name: hash((name, values)))
+    return graph
+
+
+def check_tokens(rng, count):
+    """Lazy, memoized Tokens against deriving every token from scratch, before and after replace()."""
+    failures = []
+    checked = 0
+    for theme_dict in build.themes:
+        cases = [
+            (theme_dict, reference_tokens(derived, theme_dict.base)),
+            (prepare_theme_dict(theme_dict), reference_tokens(zed_tokens, ChainMap(standard_colors, theme_dict))),
+        ]
+        for tokens, expected in cases:
+            checked += 1
+            if _items(tokens) != expected:
+                failures.append(f"{theme_dict['name']}: {sorted(set(tokens) ^ set(expected))}")
+
+    names = [f"t{i}" for i in range(12)]
+    base_names = [f"b{i}" for i in range(6)]
+    for _ in range(max(1, count // 10)):
+        graph = random_graph(rng, names, base_names)
+        base = {name: rng.randrange(100) for name in base_names if rng.random() < 0.9}
+        tokens = graph.resolve(base)
+        for _ in range(3):
+            # Memoize some tokens, then change some base tokens and override a derived one
+            for name in rng.sample(names, rng.randint(0, len(names))):
+                try:
+                    tokens[name]
+                except (KeyError, ValueError):
+                    pass
+            changes = {name: rng.randrange(100) for name in rng.sample(base_names + names, rng.randint(1, 3))}
+            tokens = tokens.replace(changes)
+            base = {**base, **changes}
+            expected = reference_tokens(graph, base)
+            checked += 1
+            actual = _items(tokens)
+            if actual != expected:
+                if not isinstance(actual, str):
+                    actual = sorted(name for name in expected if actual.get(name) != expected[name])
+                failures.append(f"after {changes}: {actual}")
+            for name in names:
+                if name in expected:
+                    continue
+                checked += 1
+                try:
+                    tokens[name]
+                    failures.append(f"{name} resolved without its inputs, or through a cycle")
+                except (KeyError, ValueError):
+                    pass
+    return checked, failures
+
+
+def check_colorbatch(rng, count):
+    """colorbatch against the scalar oklab.py versions, on the palette, the themes and random colors."""
+    try:
+        import numpy as np
+        import colorbatch
+    except ImportError:
+        return 0, None
+
+    def hexes(rgb):
+        return ["#%02x%02x%02x" % tuple(row) for row in np.asarray(rgb).reshape(-1, 3).tolist()]
+
+    def random_color():
+        return Color.from_rgb(*(rng.randrange(256) for _ in range(3)))
+
+    samples = list(colors.values()) + [random_color() for _ in range(count)]
+    rgba, _ = colorbatch.color_arrays(samples)
+    amounts = [rng.random() for _ in samples]
+    # Random OKLab points, many outside the sRGB gamut
+    points = [(rng.uniform(-0.1, 1.1), rng.uniform(-0.4, 0.4), rng.uniform(-0.4, 0.4)) for _ in range(count)]
+    lch_points = [(rng.uniform(-0.1, 1.1), rng.uniform(0, 0.4), rng.uniform(-360, 720)) for _ in range(count)]
+    translucent = [color.with_alpha(rng.choice((None, rng.randrange(256)))) for color in samples]
+    palettes = [{"name": str(i), "type": rng.choice(("dark", "light")), "bg_1": random_color(), "gray": color}
+                for i, color in enumerate(translucent)]
+    zed = get_target("zed")
+    theme_dicts = list(build.themes)
+    for theme_dict in build.themes:
+        theme_dicts += sweep(theme_dict, hues=[rng.uniform(0, 360) for _ in range(count // 100 + 1)])
+
+    def blend(color, background):
+        if color.alpha is None:
+            return color.rgb_hex
+        alpha = color.alpha / 255.0
+        return Color.from_rgb(*(int(fg * alpha + bg * (1 - alpha)) for fg, bg in zip(color.rgb, background.rgb))).rgb_hex
+
+    def zed_shades(theme_dicts):
+        return [(theme_dict["scrollbar_hover"].hex, theme_dict["scrollbar_active"].hex) for theme_dict in theme_dicts]
+
+    cases = [
+        ("round trip", hexes(colorbatch.from_oklab(colorbatch.to_oklab(rgba))),
+         [oklab.from_oklab(*oklab.to_oklab(color)).rgb_hex for color in samples]),
+        ("gamut", hexes(colorbatch.from_oklab(np.array(points))), [oklab.from_oklab(*point).rgb_hex for point in points]),
+        ("oklch round trip", hexes(colorbatch.from_oklch(colorbatch.to_oklch(rgba))),
+         [oklab.from_oklch(*oklab.to_oklch(color)).rgb_hex for color in samples]),
+        ("oklch gamut", hexes(colorbatch.from_oklch(np.array(lch_points))),
+         [oklab.from_oklch(*point).rgb_hex for point in lch_points]),
+        ("darken", hexes(colorbatch.darken(rgba)), [oklab.darken(color).rgb_hex for color in samples]),
+        ("lighten", hexes(colorbatch.lighten(rgba, 0.3)), [oklab.lighten(color, 0.3).rgb_hex for color in samples]),
+        ("darken by row", hexes(colorbatch.darken(rgba, amounts)),
+         [oklab.darken(color, amount).rgb_hex for color, amount in zip(samples, amounts)]),
+        ("lighten by row", hexes(colorbatch.lighten(rgba, amounts)),
+         [oklab.lighten(color, amount).rgb_hex for color, amount in zip(samples, amounts)]),
+        ("shades", [color.hex for color in colorbatch.derive_shades(palettes, "gray", 0.2)],
+         [(oklab.lighten if p["type"] == "dark" else oklab.darken)(p["gray"], 0.2).hex for p in palettes]),
+        ("blend over", hexes(colorbatch.blend_over(colorbatch.PaletteArrays(palettes), ["gray"], "bg_1")),
+         [blend(p["gray"], p["bg_1"]) for p in palettes]),
+        ("zed shades", zed_shades(zed.sources(t, t["name"])["theme"] for t in zed.derive(theme_dicts)),
+         zed_shades(zed.sources(t, t["name"])["theme"] for t in theme_dicts)),
+    ]
+    failures = [
+        f"{name}: {got} != {expected}"
+        for name, batch, scalar in cases
+        for got, expected in zip(batch, scalar)
+        if got != expected
+    ]
+    return sum(len(scalar) for _, _, scalar in cases), failures
+
+
+class _Element:
+    """The settings a reference trie node holds for one parent scope tuple (None: no parents)."""
+
+    def __init__(self, depth, parents, settings):
+        self.depth = depth
+        self.parents = parents
+        self.settings = settings
+
+    def copy(self):
+        return _Element(self.depth, self.parents, dict(self.settings))
+
+    def sort_key(self):
+        parents = self.parents or ()
+        return (-self.depth, -len(parents), [-len(parent) for parent in parents])
+
+
+class _ReferenceNode:
+    def __init__(self, main, scoped):
+        self.main = main
+        self.scoped = scoped
+        self.children = {}
+
+
+class ReferenceResolver:
+    """Scope resolution as the editor does it: each rule is copied into every node below it."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.root = _ReferenceNode(_Element(0, None, {}), [])
+        parsed = []
+        for index, rule in enumerate(rules):
+            for selector in parse_selectors(rule.get("scope")):
+                segments = selector.split(" ")
+                parsed.append((segments[-1], index, tuple(reversed(segments[:-1])) or None))
+        for scope, index, parents in sorted(parsed, key=lambda entry: entry[:2]):
+            rule_settings = self.rules[index].get("settings", {})
+            settings = {field: (rule_settings[field], index) for field in FIELDS
+                        if isinstance(rule_settings.get(field), str)}
+            node, depth = self._insert_path(scope)
+            if parents is None:
+                node.main.depth = depth
+                node.main.settings.update(settings)
+                continue
+            for element in node.scoped:
+                if element.parents == parents:
+                    element.depth = depth
+                    element.settings.update(settings)
+                    break
+            else:
+                node.scoped.append(_Element(depth, parents, {**node.main.settings, **settings}))
+
+    def _insert_path(self, scope):
+        node, depth = self.root, 0
+        for segment in scope.split(".") if scope else ():
+            child = node.children.get(segment)
+            if child is None:
+                child = node.children[segment] = _ReferenceNode(
+                    node.main.copy(), [element.copy() for element in node.scoped]
+                )
+            node, depth = child, depth + 1
+        return node, depth
+
+    def _node(self, scope):
+        node = self.root
+        for segment in scope.split(".") if scope else ():
+            child = node.children.get(segment)
+            if child is None:
+                break
+            node = child
+        return node
+
+    def resolve(self, stack):
+        if not stack:
+            return dict(self.root.main.settings)
+        enclosing = stack[-2::-1]
+        for element in sorted([self._node(stack[-1]).main] + self._node(stack[-1]).scoped, key=_Element.sort_key):
+            if element.parents is None or matches_parents(enclosing, element.parents):
+                return dict(element.settings)
+
+    def dead_selectors(self):
+        dead = []
+        for index, rule in enumerate(self.rules):
+            for selector in parse_selectors(rule.get("scope")):
+                segments = selector.split(" ")
+                parents = tuple(reversed(segments[:-1])) or None
+                node = self._node(segments[-1])
+                element = node.main if parents is None else next(e for e in node.scoped if e.parents == parents)
+                own = [field for field in FIELDS if isinstance(rule.get("settings", {}).get(field), str)]
+                if not any(element.settings[field][1] == index for field in own):
+                    dead.append((index, selector, sorted({element.settings[field][1] for field in own})))
+        return dead
+
+
+SCOPE_SEGMENTS = (
+    ("source", "string", "comment", "keyword", "entity", "meta", "variable"),
+    ("quoted", "line", "control", "name", "function", "other"),
+    ("double", "python", "js", "class", "definition"),
+)
+
+
+def random_scope(rng):
+    return ".".join(rng.choice(segments) for segments in SCOPE_SEGMENTS[:rng.randint(1, len(SCOPE_SEGMENTS))])
+
+
+def random_rules(rng, count):
+    rules = []
+    for _ in range(count):
+        selectors = []
+        for _ in range(rng.randint(1, 3)):
+            scopes = [random_scope(rng) for _ in range(rng.choice((1, 1, 1, 2, 3)))]
+            if len(scopes) > 1 and rng.random() < 0.2:
+                scopes.insert(-1, ">")
+            selectors.append(" ".join(scopes))
+        rule = {"scope": rng.choice((", ".join(selectors), selectors)), "settings": {}}
+        if rng.random() < 0.02:
+            del rule["scope"]
+        for field in FIELDS:
+            if rng.random() < 0.5:
+                rule["settings"][field] = f"#{rng.randrange(1 << 24):06x}"
+        rules.append(rule)
+    return rules
+
+
+def check_scopes(rng, count):
+    """ScopeResolver against the editor's rule-copying trie, on random rules and stacks."""
+    lookups = 0
+    differences = []
+    for _ in range(max(1, count // 1000)):
+        rules = random_rules(rng, rng.randint(1, 200))
+        resolver, reference = ScopeResolver(rules), ReferenceResolver(rules)
+        for _ in range(1000):
+            stack = tuple(random_scope(rng) for _ in range(rng.randint(0, 5)))
+            lookups += 1
+            if resolver.resolve(stack) != reference.resolve(stack):
+                differences.append(f"stack {' '.join(stack)!r} in {json.dumps(rules)}")
+        lookups += 1
+        if sorted(resolver.dead_selectors()) != sorted(reference.dead_selectors()):
+            differences.append(f"dead selectors of {json.dumps(rules)}")
+    return lookups, differences
+
+
+def _wait(watcher, timeout=2.0):
+    """What `watcher.wait()` returns, or None if it does not return in time."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(watcher.wait()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result[0] if result else None
+
+
+def check_watcher(rng, count):
+    """Watched file keys against the paths the watchers report, in a scratch directory."""
+    failures = []
+    files = build.watched_files(build.TARGETS)
+    for path in files:
+        if path != os.path.abspath(path):
+            failures.append(f"unnormalized key {path}")
+    if files.get(os.path.abspath(PACKAGE_JSON)) != "labels":
+        failures.append("package.json does not map to labels")
+    checked = len(files) + 1
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.mkdir(os.path.join(scratch, "src"))
+        names = ["package.json", os.path.join("src", "build.py")]
+        for name in names:
+            with open(os.path.join(scratch, name), "w") as f:
+                f.write("")
+        # Spelled the way PACKAGE_JSON was before it was normalized
+        paths = [os.path.join(scratch, "src", "..", name) for name in names]
+        expected = {os.path.abspath(path) for path in paths}
+        watchers = [PollingWatcher]
+        try:
+            InotifyWatcher(paths).close()
+            watchers.append(InotifyWatcher)
+        except (OSError, AttributeError):
+            pass
+        for watcher_class in watchers:
+            watcher = watcher_class(paths)
+            try:
+                for name in names:
+                    checked += 1
+                    with open(os.path.join(scratch, name), "w") as f:
+                        f.write(f"{rng.random()}\n")
+                    changed = _wait(watcher)
+                    if changed is None or not changed <= expected:
+                        failures.append(f"{watcher_class.__name__}: saving {name} reported {changed}")
+                if watcher_class is InotifyWatcher:
+                    # Lost events: the watcher reports every path it watches
+                    checked += 1
+                    read_end, write_end = os.pipe()
+                    os.close(watcher._fd)
+                    watcher._fd = read_end
+                    os.write(write_end, struct.pack("iIII", -1, IN_Q_OVERFLOW, 0, 0))
+                    changed = _wait(watcher)
+                    os.close(write_end)
+                    if changed != expected:
+                        failures.append(f"InotifyWatcher: queue overflow reported {changed}")
+            finally:
+                watcher.close()
+    return checked, failures
+
+
+def _run_build():
+    """Run an inline, uncached-context build; the number of jobs it ran."""
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        build._build(build.TARGETS, 0, False, False, None, check=False)
+    return int(re.search(r"^Built (\d+) jobs", output.getvalue(), re.MULTILINE).group(1))
+
+
+def check_manifest(rng, count):
+    """Which jobs a build reruns after each kind of change, building into a scratch directory."""
+    failures = []
+    saved = build.ROOT, build.CACHE_DIR, build.MANIFEST, build.code_files
+    index = rng.randrange(len(build.themes))
+    theme_dict = build.themes[index]
+    with tempfile.TemporaryDirectory() as scratch:
+        build.ROOT = scratch
+        build.CACHE_DIR = os.path.join(scratch, ".build-cache")
+        build.MANIFEST = os.path.join(build.CACHE_DIR, "manifest.json")
+        shared = os.path.join(scratch, "shared.py")
+        with open(shared, "w") as f:
+            f.write("VERSION = 1\n")
+        build.code_files = lambda: saved[3]() + [shared]
+        total = len(build.list_jobs(build.TARGETS))
+        try:
+            def expect(change, condition, built):
+                if not condition(built):
+                    failures.append(f"{change}: {built} of {total} jobs rebuilt")
+
+            expect("first build", lambda built: built == total, _run_build())
+            expect("no change", lambda built: built == 0, _run_build())
+
+            read = build.BuildManifest(build.MANIFEST).jobs[f"vscode/{index}"]["keys"]["theme"]
+            key = rng.choice([key for key in read if isinstance(theme_dict[key], Color)])
+            value = Color("#000001" if theme_dict[key] != Color("#000001") else "#000002")
+            build.themes[index] = updated(theme_dict, {key: value})
+            try:
+                expect(f"{theme_dict['name']} {key}", lambda built: 0 < built < total, _run_build())
+            finally:
+                build.themes[index] = theme_dict
+            _run_build()
+
+            outputs = [path for path in build.BuildManifest(build.MANIFEST).jobs["vscode/0"]["outputs"]]
+            os.remove(outputs[0])
+            expect("deleted output", lambda built: built == 1, _run_build())
+
+            code = build.code_digest()
+            with open(shared, "w") as f:
+                f.write("VERSION = 2\n")
+            if build.code_digest() == code:
+                failures.append("shared code change left the code digest unchanged")
+            elif build.themes_digest(build.themes, code) == build.themes_digest(build.themes, build.code_digest()):
+                failures.append("shared code change left the contrast check digest unchanged")
+            expect("shared code change", lambda built: built == total, _run_build())
+        finally:
+            build.ROOT, build.CACHE_DIR, build.MANIFEST, build.code_files = saved
+    return 6, failures
+
+
+def check_server(rng, count):
+    """Server ETags against If-None-Match, before and after theme and shared code changes."""
+    failures = []
+    server = ThemeServer(ThemeRenderer())
+
+    def etag(path, headers=None):
+        response = server.respond("GET", path, headers or {})
+        if response.status != 200:
+            failures.append(f"{path}: status {response.status}")
+        return response.headers.get("ETag")
+
+    paths = [f"/{target}/{name}" for target in build.TARGETS for name in server.renderer.output_names(target)]
+    for path in paths:
+        for headers in ({}, {"accept-encoding": "gzip"}):
+            tag = etag(path, headers)
+            for match in (tag, f"W/{tag}", f'"other", {tag}'):
+                response = server.respond("GET", path, {**headers, "if-none-match": match})
+                if response.status != 304 or response.body:
+                    failures.append(f"{path} {headers}: If-None-Match {match} got {response.status}")
+
+    index = rng.randrange(len(build.themes))
+    theme_dict = build.themes[index]
+    path = f"/vscode/{get_target('vscode').output_filename(theme_dict['name'])}"
+    tags = [etag(path)]
+    saved = build.code_files
+    with tempfile.TemporaryDirectory() as scratch:
+        shared = os.path.join(scratch, "shared.py")
+        with open(shared, "w") as f:
+            f.write("VERSION = 1\n")
+        build.code_files = lambda: saved() + [shared]
+        try:
+            server.renderer.reload()
+            tags.append(etag(path))
+            fg = Color("#000001" if theme_dict["fg"] != Color("#000001") else "#000002")
+            build.themes[index] = updated(theme_dict, {"fg": fg})
+            try:
+                server.renderer.reload()
+                tags.append(etag(path))
+            finally:
+                build.themes[index] = theme_dict
+            with open(shared, "w") as f:
+                f.write("VERSION = 2\n")
+            server.renderer.reload()
+            tags.append(etag(path))
+        finally:
+            build.code_files = saved
+            server.renderer.reload()
+    if len(set(tags)) != len(tags):
+        failures.append(f"{path}: ETags {tags} before and after adding code, a palette change and a code change")
+    stale = server.respond("GET", path, {"if-none-match": tags[1]})
+    if stale.status != 200:
+        failures.append(f"{path}: If-None-Match with an outdated ETag got {stale.status}")
+    return len(paths) * 6 + len(tags), failures
+
+
+CHECKS = {
+    "templates": check_templates,
+    "tokens": check_tokens,
+    "colorbatch": check_colorbatch,
+    "scopes": check_scopes,
+    "manifest": check_manifest,
+    "server": check_server,
+    "watcher": check_watcher,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("checks", nargs="*", metavar="check", help=f"checks to run: {', '.join(CHECKS)} (default: all)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random inputs")
+    parser.add_argument("--count", type=int, default=10000, help="random inputs per check")
+    parser.add_argument("--list", action="store_true", help="list the checks and exit")
+    args = parser.parse_args()
+    if args.list:
+        for name, check in CHECKS.items():
+            print(f"{name}: {check.__doc__.splitlines()[0]}")
+        return
+    for name in args.checks:
+        if name not in CHECKS:
+            parser.error(f"unknown check {name!r}")
+
+    failed = False
+    for name in args.checks or CHECKS:
+        checked, failures = CHECKS[name](random.Random(args.seed), args.count)
+        if failures is None:
+            print(f"{name}: skipped (NumPy not installed)")
+            continue
+        print(f"{name}: {checked} checked, {len(failures)} failed")
+        for failure in failures[:MAX_REPORTED]:
+            print(f"  {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Package the VS Code extension as a VSIX, without Node or vsce.
+
+The color themes are rendered in memory through render.ThemeRenderer and
+streamed into the archive with the rest of the extension: package.json,
+README, license and assets, minus the files .vscodeignore (and vsce's
+default ignore list) exclude. With --include and --minify the themes are
+packaged as the smaller files `build.py --include --minify` writes: base
+themes with their shared values, included by the rest. Theme files left on
+disk are never packaged. The [Content_Types].xml and
+extension.vsixmanifest entries are generated from package.json. Nothing
+but the finished .vsix is written, and entries carry a fixed timestamp so
+an unchanged extension packages to identical bytes.
+"""
+
+import argparse
+import io
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import time
+import zipfile
+from html import escape
+
+import build
+from output import write_if_changed
+from render import ThemeRenderer
+from targets import get_target
+
+EXTENSION_DIR = os.path.join(build.ROOT, "vscode")
+# Files vsce leaves out of every package
+DEFAULT_IGNORE = (
+    ".vscodeignore", "package-lock.json", "npm-debug.log", "yarn.lock", "yarn-error.log",
+    "npm-shrinkwrap.json", ".editorconfig", ".npmrc", ".yarnrc", ".gitattributes", "*.todo",
+    "tslint.yaml", ".eslintrc*", ".babelrc*", ".prettierrc*", "webpack.config.js",
+    "ISSUE_TEMPLATE.md", "CONTRIBUTING.md", "PULL_REQUEST_TEMPLATE.md", "CODE_OF_CONDUCT.md",
+    ".github", ".travis.yml", "appveyor.yml", "**/.git", "**/*.vsix", "**/.DS_Store",
+    "**/*.vsixmanifest", "**/.vscode-test/**", "node_modules",
+)
+CONTENT_TYPES = {".json": "application/json", ".vsixmanifest": "text/xml", ".md": "text/markdown"}
+# Already compressed; stored as they are
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip"}
+# Zip timestamps start in 1980
+ENTRY_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def quoteattr(value):
+    return f'"{escape(value)}"'
+
+
+def glob_regex(pattern):
+    """Compile a .vscodeignore glob, matched against "/"-separated relative paths."""
+    pattern = pattern.removeprefix("./").lstrip("/")
+    if pattern.endswith("/"):
+        pattern += "**"
+    parts = re.split(r"(\*\*/|/\*\*$|\*\*|\*|\?)", pattern)
+    tokens = {"**/": "(?:.*/)?", "/**": "(?:/.*)?", "**": ".*", "*": "[^/]*", "?": "[^/]"}
+    return re.compile("".join(tokens.get(part, re.escape(part)) for part in parts))
+
+
+def load_ignore(extension_dir=EXTENSION_DIR):
+    """(regex, negated) rules from DEFAULT_IGNORE and .vscodeignore, in order."""
+    patterns = list(DEFAULT_IGNORE)
+    try:
+        with open(os.path.join(extension_dir, ".vscodeignore"), "r") as f:
+            patterns += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        pass
+    return [(glob_regex(pattern.removeprefix("!")), pattern.startswith("!")) for pattern in patterns]
+
+
+def is_ignored(path, rules):
+    """Whether a relative path, or a directory containing it, is ignored; the last matching rule wins."""
+    prefixes = [path[:i] for i, char in enumerate(path) if char == "/"] + [path]
+    ignored = False
+    for regex, negated in rules:
+        if any(regex.fullmatch(prefix) for prefix in prefixes):
+            ignored = not negated
+    return ignored
+
+
+def extension_files(extension_dir, rules, skip=()):
+    """Relative paths of the files to package, sorted."""
+    files = []
+    for directory, dirnames, filenames in os.walk(extension_dir):
+        rel_dir = os.path.relpath(directory, extension_dir).replace(os.sep, "/")
+        prefix = "" if rel_dir == "." else rel_dir + "/"
+        dirnames[:] = [name for name in dirnames if not is_ignored(prefix + name, rules)]
+        files += [prefix + name for name in filenames if prefix + name not in skip and not is_ignored(prefix + name, rules)]
+    return sorted(files)
+
+
+def archive_name(path):
+    """Where vsce puts a file: under extension/, with a .txt extension on a bare LICENSE."""
+    if path.upper() == "LICENSE":
+        path += ".txt"
+    return f"extension/{path}"
+
+
+def content_types(names):
+    defaults = {}
+    for name in names:
+        ext = os.path.splitext(name)[1].lower()
+        if ext and ext not in defaults:
+            defaults[ext] = CONTENT_TYPES.get(ext) or mimetypes.types_map.get(ext, "application/octet-stream")
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">',
+        *(f"<Default Extension={quoteattr(ext)} ContentType={quoteattr(ctype)}/>" for ext, ctype in defaults.items()),
+        "</Types>",
+    ]
+    return "".join(lines)
+
+
+def vsix_manifest(package, names):
+    """The extension.vsixmanifest of a package.json, listing the packaged assets."""
+    tags = list(package.get("keywords", []))
+    if package.get("contributes", {}).get("themes"):
+        tags += ["theme", "color-theme"]
+    repository = package.get("repository", {})
+    repository = repository.get("url", "") if isinstance(repository, dict) else repository
+    properties = {
+        "Microsoft.VisualStudio.Code.Engine": package.get("engines", {}).get("vscode", "*"),
+        "Microsoft.VisualStudio.Code.ExtensionDependencies": ",".join(package.get("extensionDependencies", [])),
+        "Microsoft.VisualStudio.Code.ExtensionPack": ",".join(package.get("extensionPack", [])),
+        "Microsoft.VisualStudio.Code.ExtensionKind": "ui,workspace",
+        "Microsoft.VisualStudio.Code.LocalizedLanguages": "",
+        "Microsoft.VisualStudio.Services.Content.Pricing": "Free",
+    }
+    if repository:
+        properties["Microsoft.VisualStudio.Services.Links.Source"] = repository
+        properties["Microsoft.VisualStudio.Services.Links.GitHub"] = repository
+
+    assets = {"Microsoft.VisualStudio.Code.Manifest": "extension/package.json"}
+    for name in names:
+        base = name.removeprefix("extension/").lower()
+        if base == "readme.md":
+            assets["Microsoft.VisualStudio.Services.Content.Details"] = name
+        elif base == "changelog.md":
+            assets["Microsoft.VisualStudio.Services.Content.Changelog"] = name
+        elif base in ("license", "license.txt", "license.md"):
+            assets["Microsoft.VisualStudio.Services.Content.License"] = name
+    icon = package.get("icon")
+    if icon:
+        assets["Microsoft.VisualStudio.Services.Icons.Default"] = archive_name(icon.removeprefix("./"))
+
+    metadata = [
+        f'<Identity Language="en-US" Id={quoteattr(package["name"])} Version={quoteattr(package["version"])} '
+        f'Publisher={quoteattr(package["publisher"])}/>',
+        f"<DisplayName>{escape(package.get('displayName', package['name']))}</DisplayName>",
+        f'<Description xml:space="preserve">{escape(package.get("description", ""))}</Description>',
+        f"<Tags>{escape(','.join(tags))}</Tags>",
+        f"<Categories>{escape(','.join(package.get('categories', [])))}</Categories>",
+        "<GalleryFlags>Public</GalleryFlags>",
+        "<Properties>",
+        *(f"<Property Id={quoteattr(key)} Value={quoteattr(value)}/>" for key, value in properties.items()),
+        "</Properties>",
+    ]
+    if "Microsoft.VisualStudio.Services.Content.License" in assets:
+        metadata.append(f"<License>{assets['Microsoft.VisualStudio.Services.Content.License']}</License>")
+    if icon:
+        metadata.append(f"<Icon>{assets['Microsoft.VisualStudio.Services.Icons.Default']}</Icon>")
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<PackageManifest Version="2.0.0" xmlns="http://schemas.microsoft.com/developer/vsx-schema/2011" '
+        'xmlns:d="http://schemas.microsoft.com/developer/vsx-schema-design/2011">',
+        "<Metadata>", *metadata, "</Metadata>",
+        '<Installation><InstallationTarget Id="Microsoft.VisualStudio.Code"/></Installation>',
+        "<Dependencies/>",
+        "<Assets>",
+        *(f'<Asset Type={quoteattr(kind)} Path={quoteattr(path)} Addressable="true"/>' for kind, path in assets.items()),
+        "</Assets>",
+        "</PackageManifest>",
+    ]
+    return "\n".join(lines)
+
+
+def package_vsix(output=None, renderer=None, extension_dir=EXTENSION_DIR, include=False, minify=False):
+    """Write the extension's .vsix; returns its path and whether it changed.
+
+    Themes contributed in package.json are rendered by `renderer` (a
+    ThemeRenderer), and combined by the VS Code target with the `include`
+    and `minify` options if either is set; they are the only files packaged
+    from their directories. Every other file is read from `extension_dir`.
+    """
+    renderer = renderer or ThemeRenderer()
+    with open(os.path.join(extension_dir, "package.json"), "rb") as f:
+        package_bytes = f.read()
+    package = json.loads(package_bytes)
+    output = output or os.path.join(extension_dir, f"{package['name']}-{package['version']}.vsix")
+
+    themes = {
+        theme["path"].removeprefix("./"): renderer.render("vscode", os.path.basename(theme["path"]))
+        for theme in package.get("contributes", {}).get("themes", [])
+    }
+    if themes and (include or minify):
+        # Base themes are included by relative path, so they go next to the themes
+        directory = posixpath.dirname(next(iter(themes)))
+        combined = get_target("vscode").combine(
+            [(os.path.basename(path), data.decode()) for path, data in themes.items()], include=include, minify=minify
+        )
+        themes = {posixpath.join(directory, name): text.encode() for name, text in combined}
+    # The theme directories hold exactly the themes rendered here: other files
+    # there, such as base themes left by an earlier --include build, are stale
+    theme_dirs = tuple({posixpath.dirname(path) + "/" for path in themes if posixpath.dirname(path)})
+    files = [
+        path for path in extension_files(extension_dir, load_ignore(extension_dir), skip={"package.json", *themes})
+        if not path.startswith(theme_dirs)
+    ]
+    entries = {archive_name("package.json"): package_bytes}
+    for path in files:
+        with open(os.path.join(extension_dir, path), "rb") as f:
+            entries[archive_name(path)] = f.read()
+    entries.update((archive_name(path), data) for path, data in themes.items())
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        def add(name, data):
+            info = zipfile.ZipInfo(name, ENTRY_DATE)
+            stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+            info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, data)
+
+        add("extension.vsixmanifest", vsix_manifest(package, entries))
+        add("[Content_Types].xml", content_types(["extension.vsixmanifest", *entries]))
+        for name, data in entries.items():
+            add(name, data)
+    return output, write_if_changed(output, buffer.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", help="path of the .vsix (default: vscode/<name>-<version>.vsix)")
+    parser.add_argument("--include", action="store_true", help="package the values themes share as base themes they include")
+    parser.add_argument("--minify", action="store_true", help="package themes without whitespace")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    output, changed = package_vsix(args.output, include=args.include, minify=args.minify)
+    status = "Packaged" if changed else "Up to date"
+    print(f"{status}: {os.path.relpath(output)} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
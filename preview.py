@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""Render PNG previews of themes, without an editor or terminal.
+
+Each theme is rendered for VS Code, Zed and Ghostty through
+render.ThemeRenderer, and the colors the rendered files define are drawn
+side by side as mock windows: an editor with a gutter, code, a selection
+and a search match for VS Code and Zed, and a terminal with the 16-color
+ANSI palette for Ghostty. Text is drawn as blocks, so no fonts are needed.
+
+    python3 preview.py                                    # the standard themes
+    python3 preview.py --sweep "Dark Acme" --hue 0:360:10 --contrast 0.8,1,1.2
+
+Writes one PNG per theme plus a contact sheet of all of them. Themes are
+rendered in batches across a process pool. Requires NumPy.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import build
+from metadata import theme_filename
+from output import write_if_changed
+from render import ThemeRenderer
+from variants import parse_range, sweep
+
+PREVIEWS_DIR = os.path.join(build.ROOT, "previews")
+BATCH_SIZE = 32
+
+# Mock geometry in pixels, at scale 1
+CHAR_WIDTH = 2
+LINE_HEIGHT = 6
+GLYPH_HEIGHT = 3
+PADDING = 4
+GUTTER_WIDTH = 12
+PANEL_WIDTH = 96
+PANEL_HEIGHT = 84
+
+# Lines of (role, width in characters); "" is whitespace
+CODE = [
+    [("comment", 28)],
+    [("keyword", 3), ("", 1), ("fg", 6), ("fg", 8), ("", 1), ("fg", 1)],
+    [("", 4), ("fg", 5), ("", 1), ("fg", 1), ("", 1), ("string", 12)],
+    [("", 4), ("keyword", 2), ("", 1), ("fg", 5), ("fg", 2), ("", 1), ("fg", 1)],
+    [("", 8), ("keyword", 6), ("", 1), ("fg", 10)],
+    [("", 4), ("keyword", 4), ("fg", 1)],
+    [("", 8), ("fg", 4), ("", 1), ("fg", 1), ("", 1), ("number", 2)],
+    [("", 4), ("comment", 22)],
+    [("", 4), ("fg", 6), ("fg", 12), ("fg", 2)],
+    [],
+    [("keyword", 3), ("", 1), ("fg", 4), ("fg", 6), ("", 1), ("fg", 1)],
+    [("", 4), ("keyword", 6), ("", 1), ("fg", 8)],
+]
+# Selection over lines 3-4 and a search match on line 9, as (line, first char, chars)
+SELECTION = [(2, 4, 27), (3, 0, 13)]
+SEARCH_MATCH = (8, 10, 12)
+# Terminal prompt lines, as for CODE
+TERMINAL = [
+    [("green", 2), ("", 1), ("fg", 3), ("", 1), ("fg", 6)],
+    [("fg", 10), ("", 2), ("blue", 6), ("", 2), ("fg", 8)],
+    [("fg", 7), ("", 2), ("blue", 4), ("", 2), ("red", 9)],
+    [("green", 2), ("", 1), ("fg", 4), ("", 1), ("cursor", 1)],
+]
+
+_renderer = None
+
+
+def parse_color(value, default=None):
+    """A "#rrggbb[aa]" string as an RGBA float array, 0 to 1."""
+    if not isinstance(value, str) or not value.startswith("#") or len(value) not in (7, 9):
+        return default
+    rgba = [int(value[i:i + 2], 16) / 255.0 for i in range(1, len(value), 2)]
+    return np.array(rgba if len(rgba) == 4 else rgba + [1.0], dtype=np.float32)
+
+
+def vscode_scheme(data):
+    """Preview colors of a rendered VS Code theme."""
+    theme = json.loads(data)
+    colors = theme["colors"]
+    bg = parse_color(colors["editor.background"])
+    fg = parse_color(colors["editor.foreground"])
+    scheme = {
+        "bg": bg,
+        "fg": fg,
+        "gutter": parse_color(colors.get("editorGutter.background"), bg),
+        "line_number": parse_color(colors.get("editorLineNumber.foreground"), fg),
+        "selection": parse_color(colors.get("editor.selectionBackground"), fg),
+        "match": parse_color(colors.get("editor.findMatchBackground"), fg),
+    }
+    scopes = {}
+    for rule in theme.get("tokenColors", []):
+        rule_scopes = rule.get("scope", [])
+        for scope in [rule_scopes] if isinstance(rule_scopes, str) else rule_scopes:
+            scopes.setdefault(scope, rule.get("settings", {}).get("foreground"))
+    for role, scope in (("comment", "comment"), ("keyword", "keyword"), ("string", "string"),
+                        ("number", "constant.numeric")):
+        scheme[role] = parse_color(scopes.get(scope), fg)
+    return scheme
+
+
+def zed_scheme(data):
+    """Preview colors of a rendered Zed theme family's first theme."""
+    style = json.loads(data)["themes"][0]["style"]
+    bg = parse_color(style["editor.background"])
+    fg = parse_color(style["editor.foreground"])
+    syntax = style.get("syntax", {})
+    players = style.get("players") or [{}]
+    scheme = {
+        "bg": bg,
+        "fg": fg,
+        "gutter": parse_color(style.get("editor.gutter.background"), bg),
+        "line_number": parse_color(style.get("editor.line_number"), fg),
+        "selection": parse_color(players[0].get("selection", style.get("element.selected")), fg),
+        "match": parse_color(style.get("search.match_background"), fg),
+    }
+    for role, name in (("comment", "comment"), ("keyword", "keyword"), ("string", "string"), ("number", "number")):
+        scheme[role] = parse_color(syntax.get(name, {}).get("color"), fg)
+    return scheme
+
+
+def ghostty_scheme(data):
+    """Preview colors of a rendered Ghostty theme."""
+    settings = {}
+    palette = {}
+    for line in data.decode().splitlines():
+        key, sep, value = line.partition("=")
+        if not sep or line.startswith("#"):
+            continue
+        key, value = key.strip(), value.strip()
+        if key == "palette":
+            index, _, color = value.partition("=")
+            palette[int(index)] = parse_color(color.strip())
+        else:
+            settings[key] = value
+    fg = parse_color(settings["foreground"])
+    return {
+        "bg": parse_color(settings["background"]),
+        "fg": fg,
+        "cursor": parse_color(settings.get("cursor-color"), fg),
+        "selection": parse_color(settings.get("selection-background"), fg),
+        "ansi": [palette.get(i, fg) for i in range(16)],
+        "red": palette.get(1, fg),
+        "green": palette.get(2, fg),
+        "blue": palette.get(4, fg),
+    }
+
+
+def fill(image, x0, y0, x1, y1, rgba):
+    """Composite a color with alpha over a rectangle of an (H, W, 3) float image."""
+    alpha = rgba[3]
+    region = image[y0:y1, x0:x1]
+    if alpha >= 1.0:
+        region[...] = rgba[:3]
+    else:
+        region *= 1.0 - alpha
+        region += rgba[:3] * alpha
+
+
+def draw_text(image, scheme, lines, left, top):
+    for row, tokens in enumerate(lines):
+        y = top + row * LINE_HEIGHT + (LINE_HEIGHT - GLYPH_HEIGHT) // 2
+        x = left
+        for role, width in tokens:
+            if role:
+                fill(image, x, y, x + width * CHAR_WIDTH - 1, y + GLYPH_HEIGHT, scheme[role])
+            x += width * CHAR_WIDTH
+
+
+def draw_editor(image, scheme):
+    fill(image, 0, 0, PANEL_WIDTH, PANEL_HEIGHT, scheme["bg"])
+    fill(image, 0, 0, GUTTER_WIDTH, PANEL_HEIGHT, scheme["gutter"])
+    left = GUTTER_WIDTH + PADDING
+    for row in range(len(CODE)):
+        y = PADDING + row * LINE_HEIGHT + (LINE_HEIGHT - GLYPH_HEIGHT) // 2
+        digits = 2 if row >= 9 else 1
+        fill(image, GUTTER_WIDTH - 2 - digits * CHAR_WIDTH, y, GUTTER_WIDTH - 3, y + GLYPH_HEIGHT, scheme["line_number"])
+    for row, first, chars in SELECTION:
+        y = PADDING + row * LINE_HEIGHT
+        fill(image, left + first * CHAR_WIDTH, y, left + (first + chars) * CHAR_WIDTH, y + LINE_HEIGHT, scheme["selection"])
+    row, first, chars = SEARCH_MATCH
+    y = PADDING + row * LINE_HEIGHT
+    fill(image, left + first * CHAR_WIDTH, y, left + (first + chars) * CHAR_WIDTH, y + LINE_HEIGHT, scheme["match"])
+    draw_text(image, scheme, CODE, left, PADDING)
+
+
+def draw_terminal(image, scheme):
+    fill(image, 0, 0, PANEL_WIDTH, PANEL_HEIGHT, scheme["bg"])
+    y = PADDING + LINE_HEIGHT
+    fill(image, PADDING, y, PADDING + 20 * CHAR_WIDTH, y + LINE_HEIGHT, scheme["selection"])
+    draw_text(image, scheme, TERMINAL, PADDING, PADDING)
+    # ANSI palette: normal colors above bright ones
+    size = (PANEL_WIDTH - 2 * PADDING) // 8
+    top = PANEL_HEIGHT - PADDING - 2 * size
+    for i, rgba in enumerate(scheme["ansi"]):
+        x, y = PADDING + (i % 8) * size, top + (i // 8) * size
+        fill(image, x, y, x + size - 1, y + size - 1, rgba)
+
+
+def render_preview(theme_dict, label=None):
+    """Render the preview tile of a theme as an (H, W, 3) uint8 array."""
+    global _renderer
+    if _renderer is None:
+        _renderer = ThemeRenderer()
+    image = np.zeros((PANEL_HEIGHT, 3 * PANEL_WIDTH, 3), dtype=np.float32)
+    panels = [image[:, i * PANEL_WIDTH:(i + 1) * PANEL_WIDTH] for i in range(3)]
+    draw_editor(panels[0], vscode_scheme(_renderer.render("vscode", theme_dict, label)))
+    draw_editor(panels[1], zed_scheme(_renderer.render("zed", theme_dict, label)))
+    draw_terminal(panels[2], ghostty_scheme(_renderer.render("ghostty", theme_dict, label)))
+    return (image * 255.0 + 0.5).astype(np.uint8)
+
+
+def render_batch(theme_dicts, scale):
+    """Preview tiles of themes, each with its PNG scaled `scale` times (None if scale is 0)."""
+    results = []
+    for theme_dict in theme_dicts:
+        tile = render_preview(theme_dict)
+        png = None
+        if scale:
+            png = encode_png(tile.repeat(scale, axis=0).repeat(scale, axis=1) if scale > 1 else tile)
+        results.append((tile, png))
+    return results
+
+
+def encode_png(image):
+    """PNG bytes of an (H, W, 3) uint8 array."""
+    height, width, _ = image.shape
+    pixels = image.reshape(height, -1)
+    # Filter each row to mostly zeros: "Up" (minus the row above) for a repeated
+    # row, which zeroes it, and "Sub" (minus the pixel to the left) otherwise
+    repeated = np.zeros(height, dtype=bool)
+    repeated[1:] = (pixels[1:] == pixels[:-1]).all(axis=1)
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = np.where(repeated, 2, 1)
+    rows[:, 1:4] = pixels[:, :3]
+    np.subtract(pixels[:, 3:], pixels[:, :-3], out=rows[:, 4:])
+    rows[repeated, 1:] = 0
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 15, 9, zlib.Z_RLE)
+    data = compressor.compress(rows.tobytes()) + compressor.flush()
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", data) + chunk(b"IEND", b""))
+
+
+def contact_sheet(tiles, gap=2):
+    """Lay tiles out in a roughly square grid."""
+    height, width, _ = tiles[0].shape
+    columns = max(1, math.ceil(math.sqrt(len(tiles) * height / width)))
+    rows = math.ceil(len(tiles) / columns)
+    sheet = np.full((rows * (height + gap) + gap, columns * (width + gap) + gap, 3), 128, dtype=np.uint8)
+    for i, tile in enumerate(tiles):
+        y, x = gap + (i // columns) * (height + gap), gap + (i % columns) * (width + gap)
+        sheet[y:y + height, x:x + width] = tile
+    return sheet
+
+
+def render_previews(theme_dicts, output_dir=PREVIEWS_DIR, workers=None, scale=4):
+    """Write <theme>.png for each theme and contact-sheet.png of all of them.
+
+    `theme_dicts` may be a generator; themes are sent to the pool in batches
+    of BATCH_SIZE as they are generated, and rendered and encoded there.
+    Each preview is scaled up `scale` times, and skipped if `scale` is 0; the
+    contact sheet is not scaled. Returns the number of previews.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    theme_dicts = iter(theme_dicts)
+    names = []
+    tiles = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batches = []
+        for batch in iter(lambda: list(itertools.islice(theme_dicts, BATCH_SIZE)), []):
+            names += [theme_dict["name"] for theme_dict in batch]
+            batches.append(executor.submit(render_batch, batch, scale))
+        for future in batches:
+            for tile, png in future.result():
+                if png is not None:
+                    # Keep "1.5" and "15" apart in file names, as build.py does
+                    name = theme_filename(names[len(tiles)].replace(".", "p"))
+                    write_if_changed(os.path.join(output_dir, f"{name}.png"), png)
+                tiles.append(tile)
+
+    if tiles:
+        write_if_changed(os.path.join(output_dir, "contact-sheet.png"), encode_png(contact_sheet(tiles)))
+    return len(tiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default=PREVIEWS_DIR, help="output directory (default: previews)")
+    parser.add_argument("-j", "--jobs", type=int, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--scale", type=int, default=4, help="pixel size of the single-theme previews, 0 for the contact sheet only (default: 4)")
+    parser.add_argument("--sweep", metavar="THEME", help="preview variants of THEME instead of the standard themes")
+    parser.add_argument("--hue", default="0", help="hue rotations in degrees, as start:stop:step or a,b,c")
+    parser.add_argument("--contrast", default="1", help="contrast factors, as start:stop:step or a,b,c")
+    parser.add_argument("--background", action="append", metavar="BG1,BG2,BG3",
+                        help="background colors to swap in (repeatable)")
+    args = parser.parse_args()
+
+    theme_dicts = build.themes
+    if args.sweep is not None:
+        base = next((theme_dict for theme_dict in build.themes if theme_dict["name"] == args.sweep), None)
+        if base is None:
+            parser.error(f"unknown theme {args.sweep!r}")
+        backgrounds = [None] + [tuple(background.split(",")) for background in args.background or ()]
+        theme_dicts = sweep(base, parse_range(args.hue), parse_range(args.contrast), backgrounds)
+
+    started = time.perf_counter()
+    count = render_previews(theme_dicts, args.output, args.jobs, args.scale)
+    print(f"Rendered {count} previews to {os.path.relpath(args.output)} in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Render themes to bytes in memory, for embedding theme generation.
+
+    from render import ThemeRenderer
+
+    renderer = ThemeRenderer()
+    data = renderer.render("vscode", "Dark Acme")
+
+Nothing is written to disk: config, labels and templates are loaded once,
+then every render returns the bytes the build would have written. Rendered
+themes are kept in an LRU cache keyed by a content hash of their inputs
+(builder code, template, label, options and every value the target's
+sources() hand to it, such as the palette), and the hash of each named theme
+is memoized until reload(), so repeating a request costs two dict lookups.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+
+import build
+from manifest import digest_bytes, digest_file
+from metadata import PACKAGE_JSON, theme_filename
+from targets import get_target, source_path
+
+DEFAULT_CACHE_SIZE = 256
+
+_default = None
+
+
+class LRUCache:
+    """A thread-safe mapping that evicts its least recently used entries."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def digest_theme(theme_dict):
+    """Content hash of every value of a theme dict."""
+    return digest_bytes(json.dumps(sorted(theme_dict.items()), default=str))
+
+
+class ThemeRenderer:
+    """Render themes for any target, caching the results.
+
+    Themes can be named by their name ("Dark Acme"), file name stem
+    ("dark-acme") or output file name ("dark-acme-color-theme.json"), and
+    a target's extra variants by their id ("universal" for fish). For a
+    bundled target such as Zed, the bundle with every theme is rendered when
+    no theme is given. Targets are loaded on first use. Safe to share
+    between threads.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.cache = LRUCache(maxsize)
+        self.reload()
+
+    def reload(self):
+        """Reload labels and targets, e.g. after build.reload_config().
+
+        Cached renders stay valid: changed inputs change their content hash.
+        """
+        self.themes = list(build.themes)
+        self.labels = build.load_labels(PACKAGE_JSON)
+        self.code = build.code_digest()
+        # Target name -> (Target, compiled template, static digests, names)
+        self._targets = {}
+        # (target, name) -> content hash, filled in on first render
+        self._keys = {}
+
+    def _load(self, target):
+        loaded = self._targets.get(target)
+        if loaded is not None:
+            return loaded
+        if target not in build.TARGETS:
+            raise ValueError(f"unknown target {target!r}")
+        plugin = get_target(target)
+        static = [self.code, digest_file(source_path(target))]
+        if plugin.template is not None:
+            static.append(digest_file(plugin.template))
+        names = {}
+        for theme_dict in self.themes:
+            name = theme_dict["name"]
+            for alias in (name, theme_filename(name), plugin.output_filename(name)):
+                names[alias] = (theme_dict, self.labels[name], {})
+        for extra, (index, label, output_name, options) in plugin.extras.items():
+            for alias in (extra, label, output_name):
+                names[alias] = (self.themes[index], label, options)
+        for output_name in self._output_names(plugin):
+            theme_dict, label, options = names[output_name]
+            for tag, fallback_options in plugin.fallbacks.items():
+                names[plugin.fallback_filename(output_name, tag)] = (theme_dict, label, {**options, **fallback_options})
+        loaded = self._targets[target] = (plugin, plugin.load_template(), static, names)
+        return loaded
+
+    def _output_names(self, plugin):
+        names = [plugin.output_filename(theme_dict["name"]) for theme_dict in self.themes]
+        if plugin.bundle is not None:
+            return names
+        return names + [output_name for _, _, output_name, _ in plugin.extras.values()]
+
+    def output_names(self, target):
+        """The output file names of the named themes of a target, with their fallbacks."""
+        plugin = self._load(target)[0]
+        names = self._output_names(plugin)
+        if plugin.bundle is not None:
+            return [plugin.bundle] + names
+        return names + [plugin.fallback_filename(name, tag) for name in names for tag in plugin.fallbacks]
+
+    def content_key(self, target, theme=None, label=None):
+        """Content hash of the inputs of a render; see render() for the arguments."""
+        if isinstance(theme, str) or theme is None:
+            key = self._keys.get((target, theme))
+            if key is None:
+                key = self._keys[target, theme] = self._key(target, *self._job(target, theme, label))
+            return key
+        return self._key(target, *self._job(target, theme, label))
+
+    def _is_bundle(self, plugin, name):
+        if plugin.bundle is None:
+            if name is None:
+                raise ValueError(f"a theme name is required for {plugin.name}")
+            return False
+        return name is None or name == plugin.bundle
+
+    def _job(self, target, theme, label):
+        """(sources and label of each theme rendered, render options, whether it is a bundle)."""
+        plugin = self._load(target)[0]
+        if not isinstance(theme, dict) and self._is_bundle(plugin, theme):
+            entries = [(t, self.labels[t["name"]]) for t in self.themes]
+            options, bundle = {}, True
+        else:
+            if isinstance(theme, str):
+                theme_dict, label, options = self._lookup(target, theme)
+            else:
+                theme_dict, label, options = theme, label or theme["name"], {}
+            entries, bundle = [(theme_dict, label)], False
+        return [(plugin.sources(t, l), l) for t, l in entries], options, bundle
+
+    def _key(self, target, entries, options, bundle):
+        # Everything a render reads: the target code and template, the
+        # options and the labels, and every source mapping of every theme
+        static = self._load(target)[2]
+        inputs = [target, *static, json.dumps(options, sort_keys=True), str(bundle)]
+        for sources, label in entries:
+            inputs += [label, *(f"{name}:{digest_theme(sources[name])}" for name in sorted(sources))]
+        return digest_bytes(*inputs)
+
+    def _lookup(self, target, name):
+        try:
+            return self._load(target)[3][name]
+        except KeyError:
+            raise KeyError(f"unknown {target} theme {name!r}") from None
+
+    def render(self, target, theme=None, label=None):
+        """Render a theme for `target` as bytes.
+
+        `theme` is a theme name, or a theme dict (such as a generated
+        variant) labeled `label`, which defaults to its name. Raises
+        ValueError for an unknown target and KeyError for an unknown theme.
+        """
+        return self.render_with_key(target, theme, label)[1]
+
+    def render_with_key(self, target, theme=None, label=None):
+        """(content_key(), render()) of a theme, from the same inputs."""
+        if isinstance(theme, dict):
+            # Computing the sources once serves both the key and the render
+            job = self._job(target, theme, label)
+            key = self._key(target, *job)
+        else:
+            job, key = None, self.content_key(target, theme)
+        data = self.cache.get(key)
+        if data is None:
+            data = self._render_text(target, *(job or self._job(target, theme, label))).encode()
+            self.cache.put(key, data)
+        return key, data
+
+    def _render_text(self, target, entries, options, bundle):
+        plugin, template, _, _ = self._load(target)
+        rendered = [plugin.render(sources, label, template, **options) for sources, label in entries]
+        if bundle or plugin.bundle is not None:
+            return plugin.render_bundle(rendered)
+        return rendered[0]
+
+
+def render_theme(target, theme=None, label=None):
+    """Render a theme as bytes with a shared, lazily created ThemeRenderer."""
+    global _default
+    if _default is None:
+        _default = ThemeRenderer()
+    return _default.render(target, theme, label)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Serve generated themes over HTTP.
+
+Themes are rendered on demand through render.ThemeRenderer and served at
+/<target>/<output file name>, e.g. /vscode/dark-acme-color-theme.json or
+/ghostty/acme-neo; / lists them. Responses carry a strong ETag derived from
+the hash of everything the render reads (theme, palette, template and
+builder code), so clients polling with If-None-Match get a 304 until a
+theme actually changes. Bodies are gzipped for clients that accept it. Send
+SIGHUP to reload the configuration.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import signal
+import sys
+from email.utils import formatdate
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+import build
+from render import DEFAULT_CACHE_SIZE, LRUCache, ThemeRenderer
+
+CONTENT_TYPES = {
+    "vscode": "application/json",
+    "zed": "application/json",
+    "ghostty": "text/plain; charset=utf-8",
+    "fish": "text/plain; charset=utf-8",
+}
+MAX_HEADER_SIZE = 16 * 1024
+KEEP_ALIVE_TIMEOUT = 30.0
+GZIP_LEVEL = 6
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(status.phrase)
+        self.status = status
+
+
+class Response:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+
+def etag_matches(header, etag):
+    """Whether an If-None-Match header matches `etag` (weak comparison)."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def accepts_gzip(header):
+    for coding in header.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "x-gzip", "*"):
+            return params.replace(" ", "").lower() not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class ThemeServer:
+    """Route requests to rendered themes, with ETags and gzip."""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        # Content hash -> gzipped body
+        self.gzipped = LRUCache(renderer.cache.maxsize)
+
+    def reload(self):
+        build.reload_config()
+        self.renderer.reload()
+        print("Reloaded configuration", flush=True)
+
+    def index(self):
+        paths = [
+            f"/{target}/{name}"
+            for target in build.TARGETS
+            for name in self.renderer.output_names(target)
+        ]
+        return json.dumps(paths, indent=2).encode()
+
+    def respond(self, method, target, headers):
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED)
+        path = unquote(urlsplit(target).path)
+        if path == "/":
+            return Response(HTTPStatus.OK, self.index(), {"Content-Type": "application/json"})
+
+        target_name, _, name = path.strip("/").partition("/")
+        if target_name not in build.TARGETS or not name:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        try:
+            # The key covers every input of the body, so it changes whenever the body may
+            key, body = self.renderer.render_with_key(target_name, name)
+        except (KeyError, ValueError):
+            raise HTTPError(HTTPStatus.NOT_FOUND) from None
+
+        response_headers = {
+            "Content-Type": CONTENT_TYPES[target_name],
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        etag = f'"{key[:32]}"'
+        if accepts_gzip(headers.get("accept-encoding", "")):
+            etag = f'"{key[:32]}-gzip"'
+            gzipped = self.gzipped.get(key)
+            if gzipped is None:
+                gzipped = gzip.compress(body, GZIP_LEVEL, mtime=0)
+                self.gzipped.put(key, gzipped)
+            body = gzipped
+            response_headers["Content-Encoding"] = "gzip"
+        response_headers["ETag"] = etag
+
+        if etag_matches(headers.get("if-none-match", ""), etag):
+            response_headers.pop("Content-Type")
+            response_headers.pop("Content-Encoding", None)
+            return Response(HTTPStatus.NOT_MODIFIED, b"", response_headers)
+        return Response(HTTPStatus.OK, body, response_headers)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send(writer, "GET", Response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE), False)
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.send(writer, "GET", Response(HTTPStatus.BAD_REQUEST), False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                try:
+                    response = self.respond(method, target, headers)
+                except HTTPError as e:
+                    response = Response(e.status, f"{e.status.value} {e.status.phrase}\n".encode(),
+                                        {"Content-Type": "text/plain; charset=utf-8"})
+                await self.send(writer, method, response, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, writer, method, response, keep_alive):
+        headers = {
+            "Date": formatdate(usegmt=True),
+            "Content-Length": str(len(response.body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        if response.status == HTTPStatus.NOT_MODIFIED:
+            del headers["Content-Length"]
+        head = f"HTTP/1.1 {response.status.value} {response.status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1"))
+        if method != "HEAD":
+            writer.write(response.body)
+        await writer.drain()
+
+
+async def serve(host, port, cache_size):
+    server = ThemeServer(ThemeRenderer(cache_size))
+    http = await asyncio.start_server(server.handle, host, port, limit=MAX_HEADER_SIZE)
+    loop = asyncio.get_running_loop()
+    if hasattr(signal, "SIGHUP"):
+        loop.add_signal_handler(signal.SIGHUP, server.reload)
+    for sock in http.sockets:
+        print(f"Serving themes on http://{sock.getsockname()[0]}:{sock.getsockname()[1]}/", flush=True)
+    async with http:
+        await http.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("-p", "--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"rendered themes kept in memory (default: {DEFAULT_CACHE_SIZE})")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import re
+
+_HEX_COLOR = re.compile(r"#([0-9a-fA-F]{6})([0-9a-fA-F]{2})?")
+
+
+class Color:
+    """An sRGB color with an optional alpha channel.
+
+    The color is parsed once into a packed 0xRRGGBB int and an alpha byte
+    (None when the color has no alpha channel); its "#rrggbb[aa]" forms are
+    formatted on first use and cached. Colors format as their hex string, so
+    they can be used directly in templates and f-strings.
+    """
+
+    __slots__ = ("value", "alpha", "_hex", "_rgb_hex")
+
+    def __init__(self, value, alpha=None):
+        if isinstance(value, str):
+            match = _HEX_COLOR.fullmatch(value)
+            if match is None:
+                raise ValueError(f"Invalid hex color: {value!r}")
+            rgb, alpha_hex = match.groups()
+            value = int(rgb, 16)
+            if alpha_hex is not None:
+                alpha = int(alpha_hex, 16)
+        if not 0 <= value <= 0xFFFFFF or (alpha is not None and not 0 <= alpha <= 0xFF):
+            raise ValueError(f"Color out of range: {value:#x}, alpha {alpha!r}")
+        self.value = value
+        self.alpha = alpha
+        self._hex = None
+        self._rgb_hex = None
+
+    @classmethod
+    def parse(cls, value):
+        """Return `value` as a Color, parsing it if it is a hex string."""
+        return value if isinstance(value, Color) else cls(value)
+
+    @classmethod
+    def from_rgb(cls, r, g, b, alpha=None):
+        return cls((r << 16) | (g << 8) | b, alpha)
+
+    @property
+    def rgb(self):
+        value = self.value
+        return (value >> 16, (value >> 8) & 0xFF, value & 0xFF)
+
+    @property
+    def rgba(self):
+        return (*self.rgb, 0xFF if self.alpha is None else self.alpha)
+
+    @property
+    def hex(self):
+        """"#rrggbb", or "#rrggbbaa" if the color has an alpha channel."""
+        if self._hex is None:
+            if self.alpha is None:
+                self._hex = self.rgb_hex
+            else:
+                self._hex = f"{self.rgb_hex}{self.alpha:02x}"
+        return self._hex
+
+    @property
+    def rgb_hex(self):
+        """The "#rrggbb" form, without any alpha channel."""
+        if self._rgb_hex is None:
+            self._rgb_hex = f"#{self.value:06x}"
+        return self._rgb_hex
+
+    @property
+    def opaque(self):
+        """This color without its alpha channel."""
+        if self.alpha is None:
+            return self
+        color = Color(self.value)
+        color._rgb_hex = self._rgb_hex
+        return color
+
+    def with_alpha(self, alpha):
+        """This color with its alpha channel replaced by `alpha` (0-255)."""
+        color = Color(self.value, alpha)
+        color._rgb_hex = self._rgb_hex
+        return color
+
+    def __str__(self):
+        return self.hex
+
+    def __format__(self, spec):
+        return format(self.hex, spec)
+
+    def __repr__(self):
+        return f"Color({self.hex!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Color):
+            return NotImplemented
+        return self.value == other.value and self.alpha == other.alpha
+
+    def __hash__(self):
+        return hash((self.value, self.alpha))
+
+
+def parse_palette(palette):
+    """Parse a name -> hex string mapping into a name -> Color dict."""
+    return {name: Color.parse(value) for name, value in palette.items()}
@@ -0,0 +1,191 @@
+"""Batch color math over NumPy arrays.
+
+Vectorized counterparts of the OKLab/OKLCH helpers in oklab.py (lighten,
+darken, the conversions),
+over the same sRGB lookup tables, and of the alpha compositing the contrast
+check uses. Colors are held as (..., 4) RGBA arrays loaded from Color
+objects; the results are byte-identical to the scalar versions. Requires
+NumPy.
+"""
+
+import re
+
+import numpy as np
+
+import oklab
+from color import Color
+
+_HEX_COLOR = re.compile(r"^#[0-9a-fA-F]{6}([0-9a-fA-F]{2})?$")
+
+
+def is_hex_color(value):
+    return isinstance(value, str) and _HEX_COLOR.match(value) is not None
+
+
+def is_color(value):
+    return isinstance(value, Color) or is_hex_color(value)
+
+
+def color_arrays(colors):
+    """Load Colors (or hex strings) into an (N, 4) uint8 RGBA array and alpha mask.
+
+    Colors are already parsed, so this only unpacks their packed ints.
+    """
+    colors = [Color.parse(color) for color in colors]
+    count = len(colors)
+    values = np.fromiter((color.value for color in colors), dtype=np.uint32, count=count)
+    alpha = np.fromiter((-1 if color.alpha is None else color.alpha for color in colors), dtype=np.int16, count=count)
+    rgba = np.empty((count, 4), dtype=np.uint8)
+    rgba[:, 0] = values >> 16
+    rgba[:, 1] = (values >> 8) & 0xFF
+    rgba[:, 2] = values & 0xFF
+    rgba[:, 3] = np.where(alpha < 0, 0xFF, alpha)
+    return rgba, alpha >= 0
+
+
+def to_colors(rgb, alpha):
+    """Colors of the rows of an (N, 3+) RGB array, with the alpha values in `alpha` (None: none)."""
+    return [Color.from_rgb(r, g, b, a) for (r, g, b), a in zip(np.asarray(rgb)[:, :3].tolist(), alpha)]
+
+
+_SRGB_TO_LINEAR = np.array(oklab.SRGB_TO_LINEAR)
+_LINEAR_MIDPOINTS = np.array(oklab.LINEAR_MIDPOINTS)
+
+
+def to_oklab(rgba):
+    """(..., 3) OKLab array of the RGB channels of an RGBA array."""
+    linear = _SRGB_TO_LINEAR[rgba[..., :3]]
+    r, g, b = linear[..., 0], linear[..., 1], linear[..., 2]
+    l = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return np.stack([
+        0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+        1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+        0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s,
+    ], axis=-1)
+
+
+def _linear(L, a, b):
+    l = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return np.stack([
+        4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+        -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+        -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s,
+    ], axis=-1)
+
+
+def _in_gamut(rgb):
+    return ((rgb >= -oklab.GAMUT_EPSILON) & (rgb <= 1 + oklab.GAMUT_EPSILON)).all(axis=-1)
+
+
+def from_oklab(lab):
+    """(..., 3) 0-255 RGB array of an OKLab array, reducing chroma to fit sRGB."""
+    L = np.clip(lab[..., 0], 0.0, 1.0)
+    a, b = lab[..., 1], lab[..., 2]
+    rgb = _linear(L, a, b)
+    outside = ~_in_gamut(rgb)
+    if outside.any():
+        L, a, b = L[outside], a[outside], b[outside]
+        lo, hi = np.zeros(len(L)), np.ones(len(L))
+        for _ in range(oklab.GAMUT_STEPS):
+            mid = (lo + hi) / 2
+            fits = _in_gamut(_linear(L, a * mid, b * mid))
+            lo = np.where(fits, mid, lo)
+            hi = np.where(fits, hi, mid)
+        rgb[outside] = _linear(L, a * lo, b * lo)
+    return np.searchsorted(_LINEAR_MIDPOINTS, rgb).astype(np.int64)
+
+
+def to_oklch(rgba):
+    """(..., 3) OKLCH array of the RGB channels of an RGBA array, hue in degrees 0-360."""
+    lab = to_oklab(rgba)
+    a, b = lab[..., 1], lab[..., 2]
+    return np.stack([lab[..., 0], np.hypot(a, b), np.degrees(np.arctan2(b, a)) % 360.0], axis=-1)
+
+
+def from_oklch(lch):
+    """(..., 3) 0-255 RGB array of an OKLCH array, reducing chroma to fit sRGB."""
+    C, hue = lch[..., 1], np.radians(lch[..., 2])
+    return from_oklab(np.stack([lch[..., 0], C * np.cos(hue), C * np.sin(hue)], axis=-1))
+
+
+def _amount(amount):
+    return np.asarray(amount, dtype=np.float64) if np.ndim(amount) else amount
+
+
+def darken(rgba, amount=0.1):
+    """Scale OKLab lightness toward black by `amount` (scalar or per-row array)."""
+    lab = to_oklab(rgba)
+    lab[..., 0] = lab[..., 0] * (1 - _amount(amount))
+    return from_oklab(lab)
+
+
+def lighten(rgba, amount=0.1):
+    """Move OKLab lightness toward white by `amount` (scalar or per-row array)."""
+    lab = to_oklab(rgba)
+    L = lab[..., 0]
+    lab[..., 0] = L + (1 - L) * _amount(amount)
+    return from_oklab(lab)
+
+
+def blend(rgba, has_alpha, background):
+    """Compose colors with an alpha channel over opaque backgrounds.
+
+    Rows without an alpha channel are returned unchanged.
+    """
+    fg = rgba[..., :3].astype(np.int64)
+    bg = background[..., :3].astype(np.int64)
+    alpha = rgba[..., 3:4] / 255.0
+    blended = (fg * alpha + bg * (1 - alpha)).astype(np.int64)
+    return np.where(has_alpha[..., None], blended, fg)
+
+
+class PaletteArrays:
+    """Theme dictionaries loaded into one RGBA array.
+
+    `rgba` has shape (themes, keys, 4) over every key that holds a hex color
+    in all themes, and `has_alpha` marks which entries carried an alpha
+    channel.
+    """
+
+    def __init__(self, theme_dicts):
+        theme_dicts = list(theme_dicts)
+        keys = set.intersection(*(set(theme_dict) for theme_dict in theme_dicts)) if theme_dicts else set()
+        self.keys = sorted(key for key in keys if all(is_color(t[key]) for t in theme_dicts))
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        rgba, has_alpha = color_arrays(t[key] for t in theme_dicts for key in self.keys)
+        self.rgba = rgba.reshape(len(theme_dicts), len(self.keys), 4)
+        self.has_alpha = has_alpha.reshape(len(theme_dicts), len(self.keys))
+        self.is_dark = np.array([t.get("type") == "dark" for t in theme_dicts], dtype=bool)
+
+    def __getitem__(self, key):
+        """RGBA column of `key` across all themes."""
+        return self.rgba[:, self.index[key]]
+
+    def alpha_mask(self, key):
+        return self.has_alpha[:, self.index[key]]
+
+
+
+def derive_shades(theme_dicts, key, amount=0.1):
+    """Lighten `key` for dark themes and darken it for light ones, in bulk.
+
+    Returns one Color per theme, keeping the alpha of `key`; this is how the
+    Zed builder derives its scrollbar hover and active colors.
+    """
+    theme_dicts = list(theme_dicts)
+    colors = [theme_dict[key] for theme_dict in theme_dicts]
+    rgba, _ = color_arrays(colors)
+    is_dark = np.array([theme_dict.get("type") == "dark" for theme_dict in theme_dicts], dtype=bool)
+    shades = np.where(is_dark[:, None], lighten(rgba, amount), darken(rgba, amount))
+    return to_colors(shades, [Color.parse(color).alpha for color in colors])
+
+
+def blend_over(palette, keys, background_key):
+    """(themes, keys, 3) RGB of each of `keys` of a PaletteArrays composed over `background_key`."""
+    rgba = np.stack([palette[key] for key in keys], axis=1)
+    has_alpha = np.stack([palette.alpha_mask(key) for key in keys], axis=1)
+    return blend(rgba, has_alpha, np.broadcast_to(palette[background_key][:, None, :], rgba.shape))
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 
-colors = {
+from color import parse_palette
+from tokens import TokenGraph
+
+colors = parse_palette({
     "paleyellow_1": "#ffffea",
     "paleyellow_2": "#f2f2dd",
     "paleyellow_3": "#eeeed9",
@@ -67,58 +70,83 @@ colors = {
     "coolgray_2": "#e8eef5",
     # Muted blue
     "blue_muted": "#5a7aa0",
-}
+})
+
+derived = TokenGraph()
+
+
+@derived.token("fg")
+def fg_dim(fg):
+    return fg.with_alpha(0x78)
+
+
+@derived.token("fg")
+def fg_faint(fg):
+    return fg.with_alpha(0x40)
+
+
+@derived.token("fg")
+def fg_ghost(fg):
+    return fg.with_alpha(0x20)
+
+
+@derived.token("fg")
+def neutral_hl(fg):
+    return fg.with_alpha(0x10)
+
+
+@derived.token("fg", "type")
+def border_1(fg, type):
+    return fg.with_alpha(0x20 if type == "dark" else 0x15)
+
+
+@derived.token("fg")
+def border_2(fg):
+    return fg.with_alpha(0xcc)
+
+
+@derived.token("badge_bg")
+def button_bg(badge_bg):
+    return badge_bg
+
+
+@derived.token("badge_fg")
+def button_fg(badge_fg):
+    return badge_fg
+
+
+# The palette's border_1 and border_2 are derived per theme instead, as base
+# values would override their rules
+theme_colors = {name: color for name, color in colors.items() if name not in derived}
 
 base = {
-    **colors,
+    **theme_colors,
     "type": "light",
     "blank_bg": colors["white"],
     "popup_bg": colors["white"],
     "fg": colors["black"],
-    "fg_dim": colors["black"] + "78",
-    "fg_faint": colors["black"] + "40",
-    "fg_ghost": colors["black"] + "20",
-    "neutral_hl": colors["black"] + "10",
     "badge_bg": colors["purple_1"],
     "badge_fg": colors["white"],
-    "button_bg": colors["purple_1"],
-    "button_fg": colors["white"],
 }
 
 dark_acme_base = {
-    **colors,
+    **theme_colors,
     "type": "dark",
     "blank_bg": colors["darkbrown_1"],
     "popup_bg": colors["darkbrown_3"],
     "fg": colors["warmbeige_1"],
-    "fg_dim": colors["warmbeige_1"] + "78",
-    "fg_faint": colors["warmbeige_1"] + "40",
-    "fg_ghost": colors["warmbeige_1"] + "20",
-    "neutral_hl": colors["warmbeige_1"] + "10",
     "badge_bg": colors["purple_muted"],
     "badge_fg": colors["warmbeige_2"],
-    "button_bg": colors["purple_muted"],
-    "button_fg": colors["warmbeige_2"],
-    "border_1": colors["warmbeige_1"] + "20",
-    "border_2": colors["warmbeige_1"] + "cc",
 }
 
 dark_white_base = {
-    **colors,
+    **theme_colors,
     "type": "dark",
     "blank_bg": colors["darkgray_1"],
     "popup_bg": colors["darkgray_3"],
     "fg": colors["coolgray_1"],
-    "fg_dim": colors["coolgray_1"] + "78",
-    "fg_faint": colors["coolgray_1"] + "40",
-    "fg_ghost": colors["coolgray_1"] + "20",
-    "neutral_hl": colors["coolgray_1"] + "10",
     "badge_bg": colors["blue_muted"],
     "badge_fg": colors["coolgray_2"],
-    "button_bg": colors["blue_muted"],
-    "button_fg": colors["coolgray_2"],
-    "border_1": colors["coolgray_1"] + "20",
-    "border_2": colors["coolgray_1"] + "cc",
 }
 
 themes = [
@@ -130,9 +158,9 @@ themes = [
         "bg_3": colors["paleyellow_3"],
         "ui_bg": colors["cyan_4"],
         "ui_hl": colors["cyan_3"],
-        "match_bg": colors["yellow_2"] + "ee",
-        "match_focus_bg": colors["purple_2"] + "aa",
-        "selection_bg": colors["yellow_2"] + "ee",
+        "match_bg": colors["yellow_2"].with_alpha(0xee),
+        "match_focus_bg": colors["purple_2"].with_alpha(0xaa),
+        "selection_bg": colors["yellow_2"].with_alpha(0xee),
         "gray": colors["paleyellow_4"],
     },
     {
@@ -143,8 +171,8 @@ themes = [
         "bg_3": colors["gray_2"],
         "ui_bg": colors["blue_4"],
         "ui_hl": colors["blue_2"],
-        "match_bg": colors["orange_2"] + "ee",
-        "match_focus_bg": colors["blue_3"] + "ee",
+        "match_bg": colors["orange_2"].with_alpha(0xee),
+        "match_focus_bg": colors["blue_3"].with_alpha(0xee),
         "selection_bg": colors["gray_3"],
         "gray": colors["gray_4"],
         "yellow_2": colors["orange_2"],
@@ -157,9 +185,9 @@ themes = [
         "bg_3": colors["darkbrown_3"],
         "ui_bg": colors["darkteal_1"],
         "ui_hl": colors["darkteal_2"],
-        "match_bg": colors["warmgold_1"] + "ee",
-        "match_focus_bg": colors["purple_dark"] + "aa",
-        "selection_bg": colors["warmgold_2"] + "ee",
+        "match_bg": colors["warmgold_1"].with_alpha(0xee),
+        "match_focus_bg": colors["purple_dark"].with_alpha(0xaa),
+        "selection_bg": colors["warmgold_2"].with_alpha(0xee),
         "gray": colors["darkbrown_4"],
     },
     {
@@ -170,10 +198,12 @@ themes = [
         "bg_3": colors["darkgray_3"],
         "ui_bg": colors["darkblue_1"],
         "ui_hl": colors["darkblue_2"],
-        "match_bg": colors["warmgold_1"] + "ee",
-        "match_focus_bg": colors["darkblue_3"] + "ee",
+        "match_bg": colors["warmgold_1"].with_alpha(0xee),
+        "match_focus_bg": colors["darkblue_3"].with_alpha(0xee),
         "selection_bg": colors["darkgray_5"],
         "gray": colors["darkgray_4"],
     },
 ]
 
+# Derived tokens (fg_dim, border_1, ...) are computed on first use
+themes = [derived.resolve(theme_dict) for theme_dict in themes]
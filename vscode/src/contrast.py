@@ -0,0 +1,123 @@
+"""Batch WCAG 2 and APCA contrast checks across themes.
+
+Builds the full foreground x background matrix for every theme in one
+vectorized pass. Translucent backgrounds are composed over bg_1 and
+translucent foregrounds over the resulting background (see
+colorbatch.blend_over). Requires NumPy.
+"""
+
+import numpy as np
+
+from colorbatch import PaletteArrays, blend, blend_over
+
+FOREGROUNDS = (
+    "fg", "fg_dim", "gray",
+    "red_1", "green_1", "yellow_1", "blue_1", "magenta_1", "cyan_1",
+)
+BACKGROUNDS = ("bg_1", "ui_bg", "selection_bg", "match_bg")
+BASE_BACKGROUND = "bg_1"
+
+# Minimum WCAG 2 contrast ratio and APCA |Lc| per foreground, on any of the
+# backgrounds. Comments (fg_dim) and gray are deliberately low contrast in
+# these themes, so their floors only guard against them becoming invisible.
+THRESHOLDS = {
+    "fg": (4.5, 60.0),
+    "fg_dim": (2.0, 20.0),
+    "gray": (1.5, 10.0),
+    "red_1": (1.8, 15.0),
+    "green_1": (1.8, 15.0),
+    "yellow_1": (1.8, 15.0),
+    "blue_1": (1.8, 15.0),
+    "magenta_1": (1.8, 15.0),
+    "cyan_1": (1.8, 15.0),
+}
+
+
+def relative_luminance(rgb):
+    """WCAG 2 relative luminance of (..., 3) 0-255 sRGB values."""
+    c = np.asarray(rgb, dtype=np.float64) / 255.0
+    linear = np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def wcag_ratio(fg_rgb, bg_rgb):
+    """WCAG 2 contrast ratio, 1 to 21."""
+    l1 = relative_luminance(fg_rgb)
+    l2 = relative_luminance(bg_rgb)
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+
+def _apca_luminance(rgb):
+    y = (np.asarray(rgb, dtype=np.float64) / 255.0) ** 2.4 @ np.array([0.2126729, 0.7151522, 0.0721750])
+    return np.where(y < 0.022, y + np.clip(0.022 - y, 0.0, None) ** 1.414, y)
+
+
+def apca_lc(fg_rgb, bg_rgb):
+    """APCA 0.0.98G lightness contrast Lc, roughly -108 to 106.
+
+    Positive for dark text on light backgrounds, negative for light text on
+    dark ones.
+    """
+    y_text = _apca_luminance(fg_rgb)
+    y_bg = _apca_luminance(bg_rgb)
+    normal = (y_bg ** 0.56 - y_text ** 0.57) * 1.14
+    reverse = (y_bg ** 0.65 - y_text ** 0.62) * 1.14
+    lc = np.where(
+        y_bg > y_text,
+        np.where(normal < 0.1, 0.0, normal - 0.027),
+        np.where(reverse > -0.1, 0.0, reverse + 0.027),
+    )
+    return np.where(np.abs(y_bg - y_text) < 0.0005, 0.0, lc) * 100.0
+
+
+class ContrastMatrix:
+    """WCAG and APCA contrast of every foreground on every background.
+
+    `wcag` and `apca` have shape (themes, foregrounds, backgrounds).
+    """
+
+    def __init__(self, theme_dicts, foregrounds=FOREGROUNDS, backgrounds=BACKGROUNDS):
+        self.theme_names = [theme_dict["name"] for theme_dict in theme_dicts]
+        self.foregrounds = tuple(foregrounds)
+        self.backgrounds = tuple(backgrounds)
+        palette = PaletteArrays(theme_dicts)
+
+        # (themes, backgrounds, 3): backgrounds composed over bg_1
+        bg = blend_over(palette, self.backgrounds, BASE_BACKGROUND)
+
+        # (themes, foregrounds, backgrounds, 4): foregrounds composed over each background
+        fg = np.stack([palette[key] for key in self.foregrounds], axis=1)[:, :, None, :]
+        fg_alpha = np.stack([palette.alpha_mask(key) for key in self.foregrounds], axis=1)[:, :, None]
+        shape = (len(theme_dicts), len(self.foregrounds), len(self.backgrounds))
+        fg = blend(
+            np.broadcast_to(fg, shape + (4,)),
+            np.broadcast_to(fg_alpha, shape),
+            np.broadcast_to(bg[:, None, :, :], shape + (3,)),
+        )
+        bg = np.broadcast_to(bg[:, None, :, :], shape + (3,))
+
+        self.wcag = wcag_ratio(fg, bg)
+        self.apca = apca_lc(fg, bg)
+
+    def violations(self, thresholds=THRESHOLDS):
+        """List (theme, foreground, background, wcag, apca) entries below their thresholds."""
+        min_wcag = np.array([thresholds.get(key, (1.0, 0.0))[0] for key in self.foregrounds])
+        min_apca = np.array([thresholds.get(key, (1.0, 0.0))[1] for key in self.foregrounds])
+        failing = (self.wcag < min_wcag[None, :, None]) | (np.abs(self.apca) < min_apca[None, :, None])
+        return [
+            (self.theme_names[t], self.foregrounds[f], self.backgrounds[b], float(self.wcag[t, f, b]), float(self.apca[t, f, b]))
+            for t, f, b in zip(*np.nonzero(failing))
+        ]
+
+
+def check_contrast(theme_dicts, thresholds=THRESHOLDS):
+    """Validate every theme in one pass, returning the list of violations."""
+    theme_dicts = list(theme_dicts)
+    if not theme_dicts:
+        return []
+    return ContrastMatrix(theme_dicts).violations(thresholds)
+
+
+def format_violation(violation):
+    theme, fg, bg, wcag, apca = violation
+    return f"{theme}: {fg} on {bg}: WCAG {wcag:.2f}:1, APCA Lc {apca:.1f}"
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+
+class RecordingMapping(Mapping):
+    """Read-only view of a mapping that records which keys were read."""
+
+    def __init__(self, mapping):
+        self._mapping = mapping
+        self.keys_read = set()
+
+    def __getitem__(self, key):
+        self.keys_read.add(key)
+        return self._mapping[key]
+
+    def __iter__(self):
+        return iter(self._mapping)
+
+    def __len__(self):
+        return len(self._mapping)
+
+
+def digest_bytes(*parts):
+    """SHA-256 of the given strings or bytes, as hex."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        h.update(hashlib.sha256(part).digest())
+    return h.hexdigest()
+
+
+def digest_file(path):
+    with open(path, "rb") as f:
+        return digest_bytes(f.read())
+
+
+def digest_inputs(sources, keys):
+    """Digest the current values of the recorded keys of each source mapping."""
+    values = {
+        name: [[key, sources[name].get(key)] for key in sorted(keys.get(name, ()))]
+        for name in sorted(sources)
+    }
+    return digest_bytes(json.dumps(values, sort_keys=True, default=str))
+
+
+def file_stamp(path):
+    """Size and modification time of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class BuildManifest:
+    """Per-job record of the inputs and outputs of the last build.
+
+    Each job entry holds a digest of its static inputs (builder source,
+    template, label), the keys it read from each source mapping along with a
+    digest of their values, and a stat stamp of every output it wrote. A job
+    is fresh when all of those still match. It also records the digest of
+    the inputs of each check that passed, so unchanged inputs are not
+    checked again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.jobs = data.get("jobs", {})
+        self.checks = data.get("checks", {})
+
+    def is_fresh(self, job_id, static_digest, sources):
+        entry = self.jobs.get(job_id)
+        if entry is None or entry["static"] != static_digest:
+            return False
+        if digest_inputs(sources, entry["keys"]) != entry["inputs"]:
+            return False
+        return all(file_stamp(path) == stamp for path, stamp in entry["outputs"].items())
+
+    def record(self, job_id, static_digest, sources, keys, outputs):
+        keys = {name: sorted(read) for name, read in keys.items()}
+        self.jobs[job_id] = {
+            "static": static_digest,
+            "keys": keys,
+            "inputs": digest_inputs(sources, keys),
+            "outputs": {path: file_stamp(path) for path in outputs},
+        }
+
+    def is_checked(self, check, digest):
+        return self.checks.get(check) == digest
+
+    def record_check(self, check, digest):
+        self.checks[check] = digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump({"jobs": self.jobs, "checks": self.checks}, f, indent=2, sort_keys=True)
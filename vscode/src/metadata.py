@@ -0,0 +1,53 @@
+import json
+import os
+import re
+
+PACKAGE_JSON = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "package.json"))
+
+# package.json path -> (mtime, size, label index)
+_label_indexes = {}
+
+
+def theme_filename(name):
+    """Convert theme name to filename format."""
+    filename = re.sub(r"[^\w\s-]", "", name.lower())
+    filename = re.sub(r"[-\s]+", "-", filename)
+    return filename.strip("-")
+
+
+def theme_key(path):
+    """Index key of a contributed theme path: "./themes/acme-color-theme.json" -> "acme"."""
+    key = os.path.basename(path)
+    if key.endswith(".json"):
+        key = key[: -len(".json")]
+    if key.endswith("-color-theme"):
+        key = key[: -len("-color-theme")]
+    return key
+
+
+def load_label_index(package_json_path=PACKAGE_JSON):
+    """Map theme filenames to their package.json labels.
+
+    package.json is parsed once and re-read only when its mtime or size
+    changes.
+    """
+    st = os.stat(package_json_path)
+    cached = _label_indexes.get(package_json_path)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+
+    with open(package_json_path, "r") as f:
+        package = json.load(f)
+
+    index = {}
+    for theme in package.get("contributes", {}).get("themes", []):
+        key = theme_key(theme.get("path", ""))
+        if key and "label" in theme:
+            index.setdefault(key, theme["label"])
+    _label_indexes[package_json_path] = (st.st_mtime_ns, st.st_size, index)
+    return index
+
+
+def get_theme_label(package_json_path, theme_name):
+    """Get the label from package.json for a given theme name."""
+    return load_label_index(package_json_path).get(theme_filename(theme_name), theme_name)
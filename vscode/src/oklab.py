@@ -0,0 +1,125 @@
+"""Perceptual color math in OKLab / OKLCH.
+
+Derived shades, hue rotations and mixes are computed in OKLab
+(https://bottosson.github.io/posts/oklab/), where equal steps look equally
+large and changing lightness keeps the hue, unlike scaling sRGB channels.
+Results outside the sRGB gamut are brought back by reducing their chroma,
+keeping lightness and hue.
+
+sRGB decoding and encoding go through precomputed tables: the 256 linear
+values of the 8-bit channel codes, and the midpoints between them, which
+map a linear value to the nearest code by binary search. colorbatch has
+vectorized counterparts over the same tables.
+"""
+
+import math
+from bisect import bisect_left
+
+from color import Color
+
+# 8-bit sRGB code -> linear value
+SRGB_TO_LINEAR = tuple(
+    c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4 for c in (i / 255.0 for i in range(256))
+)
+# Linear values halfway between consecutive codes; bisecting them rounds to the nearest code
+LINEAR_MIDPOINTS = tuple((lo + hi) / 2 for lo, hi in zip(SRGB_TO_LINEAR, SRGB_TO_LINEAR[1:]))
+
+GAMUT_EPSILON = 1e-9
+GAMUT_STEPS = 20
+
+
+def linear_to_srgb(value):
+    """Nearest 8-bit sRGB code of a linear value, clamped to 0-255."""
+    return bisect_left(LINEAR_MIDPOINTS, value)
+
+
+def _lab(r, g, b):
+    l = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return (
+        0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+        1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+        0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s,
+    )
+
+
+def _linear(L, a, b):
+    l = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return (
+        4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+        -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+        -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s,
+    )
+
+
+def _in_gamut(rgb):
+    return all(-GAMUT_EPSILON <= channel <= 1 + GAMUT_EPSILON for channel in rgb)
+
+
+def to_oklab(color):
+    """(L, a, b) of a Color, ignoring its alpha."""
+    r, g, b = color.rgb
+    return _lab(SRGB_TO_LINEAR[r], SRGB_TO_LINEAR[g], SRGB_TO_LINEAR[b])
+
+
+def from_oklab(L, a, b, alpha=None):
+    """The Color nearest to an OKLab color, reducing chroma to fit sRGB."""
+    L = min(1.0, max(0.0, L))
+    rgb = _linear(L, a, b)
+    if not _in_gamut(rgb):
+        # Bisect the largest chroma scale that stays in gamut
+        lo, hi = 0.0, 1.0
+        for _ in range(GAMUT_STEPS):
+            mid = (lo + hi) / 2
+            if _in_gamut(_linear(L, a * mid, b * mid)):
+                lo = mid
+            else:
+                hi = mid
+        rgb = _linear(L, a * lo, b * lo)
+    return Color.from_rgb(*map(linear_to_srgb, rgb), alpha)
+
+
+def to_oklch(color):
+    """(L, C, h) of a Color: lightness, chroma and hue in degrees, 0 to 360."""
+    L, a, b = to_oklab(color)
+    return L, math.hypot(a, b), math.degrees(math.atan2(b, a)) % 360.0
+
+
+def from_oklch(L, C, h, alpha=None):
+    """The Color nearest to an OKLCH color, reducing chroma to fit sRGB."""
+    hue = math.radians(h)
+    return from_oklab(L, C * math.cos(hue), C * math.sin(hue), alpha)
+
+
+def lighten(color, amount=0.1):
+    """Move a color's lightness `amount` (0.0 to 1.0) of the way to white, keeping hue and alpha."""
+    L, a, b = to_oklab(color)
+    return from_oklab(L + (1 - L) * amount, a, b, color.alpha)
+
+
+def darken(color, amount=0.1):
+    """Scale a color's lightness toward black by `amount` (0.0 to 1.0), keeping hue and alpha."""
+    L, a, b = to_oklab(color)
+    return from_oklab(L * (1 - amount), a, b, color.alpha)
+
+
+def rotate_hue(color, degrees):
+    """Rotate the hue of a color, keeping its lightness, chroma and alpha."""
+    if not degrees:
+        return color
+    L, a, b = to_oklab(color)
+    cos, sin = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return from_oklab(L, a * cos - b * sin, a * sin + b * cos, color.alpha)
+
+
+def mix(color, other, t=0.5):
+    """Interpolate from `color` (t=0) to `other` (t=1) in OKLab, keeping `color`'s alpha.
+
+    Values of `t` outside 0-1 extrapolate along the same line.
+    """
+    L1, a1, b1 = to_oklab(color)
+    L2, a2, b2 = to_oklab(other)
+    return from_oklab(L1 + (L2 - L1) * t, a1 + (a2 - a1) * t, b1 + (b2 - b1) * t, color.alpha)
@@ -0,0 +1,67 @@
+"""Search OKLCH for colors that contrast with a set of other colors.
+
+Used to pick highlight colors that must work on every theme at once, such
+as the selection background of the fish universal theme, which may be shown
+on light or dark terminals. Candidates are scored by their minimum WCAG 2
+contrast ratio against all of the given colors, over a coarse OKLCH grid
+around a seed color that is then refined around the best candidate. Among
+near-equal scores the candidate closest to the seed wins, so the result
+keeps the seed's character. Requires NumPy.
+"""
+
+import numpy as np
+
+from color import Color
+from colorbatch import color_arrays, from_oklch, to_oklab, to_oklch
+from contrast import relative_luminance
+
+# Grid points per axis: lightness, chroma, hue
+GRID = (41, 9, 13)
+REFINE_ROUNDS = 3
+MAX_CHROMA = 0.25
+HUE_RANGE = 30.0
+# Scores within this fraction of the best count as ties
+TIE_TOLERANCE = 0.01
+
+
+def _grid(lightness, chroma, hue):
+    """(N, 3) OKLCH points spanning the ranges, GRID points per axis."""
+    L, C, h = np.meshgrid(np.linspace(*lightness, GRID[0]), np.linspace(*chroma, GRID[1]),
+                          np.linspace(*hue, GRID[2]), indexing="ij")
+    return np.stack([L.ravel(), C.ravel(), h.ravel()], axis=-1)
+
+
+def min_contrast(rgb, colors):
+    """Minimum WCAG 2 contrast ratio of each (N, 3) RGB row against `colors`."""
+    candidates = relative_luminance(rgb)[:, None]
+    others = relative_luminance(color_arrays(colors)[0][:, :3])[None, :]
+    ratios = (np.maximum(candidates, others) + 0.05) / (np.minimum(candidates, others) + 0.05)
+    return ratios.min(axis=1)
+
+
+def search_color(colors, seed):
+    """The color with the highest minimum contrast against `colors`, near `seed`.
+
+    Returns the Color and its minimum contrast ratio.
+    """
+    seed_rgba = color_arrays([seed])[0]
+    seed_lab, seed_hue = to_oklab(seed_rgba)[0], to_oklch(seed_rgba)[0, 2]
+    lightness, chroma, hue = (0.0, 1.0), (0.0, MAX_CHROMA), (seed_hue - HUE_RANGE, seed_hue + HUE_RANGE)
+
+    for _ in range(REFINE_ROUNDS):
+        rgb = from_oklch(_grid(lightness, chroma, hue))
+        scores = min_contrast(rgb, colors)
+        # Among near-best candidates, take the one closest to the seed
+        ties = np.flatnonzero(scores >= scores.max() * (1 - TIE_TOLERANCE))
+        distances = np.linalg.norm(to_oklab(rgb[ties]) - seed_lab, axis=1)
+        best = ties[np.argmin(distances)]
+        best_rgb, best_score = rgb[best], scores[best]
+
+        # Zoom in around the best candidate
+        L, C, h = to_oklch(best_rgb[None])[0]
+        steps = [(hi - lo) / (n - 1) for (lo, hi), n in zip((lightness, chroma, hue), GRID)]
+        lightness = (max(0.0, L - steps[0]), min(1.0, L + steps[0]))
+        chroma = (max(0.0, C - steps[1]), C + steps[1])
+        hue = (h - steps[2], h + steps[2])
+
+    return Color.from_rgb(*map(int, best_rgb)), float(best_score)
@@ -0,0 +1,133 @@
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_CHUNK_SIZE = 1 << 16
+
+
+def write_if_changed(path, text):
+    """Write `text` to `path` unless the file already holds exactly those bytes.
+
+    Leaving unchanged files alone keeps their mtimes stable for packaging and
+    file watchers. Changed files are replaced atomically, so readers never
+    see a partial file. Returns True if the file was written.
+    """
+    data = text.encode() if isinstance(text, str) else text
+    if file_matches(path, [data], len(data)):
+        return False
+    write_atomic(path, data)
+    return True
+
+
+def file_matches(path, chunks, size):
+    """Whether the file at `path` holds exactly the `size` bytes of `chunks`, comparing sizes first."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        with open(path, "rb") as f:
+            return all(f.read(len(chunk)) == chunk for chunk in chunks)
+    except FileNotFoundError:
+        return False
+
+
+def write_atomic(path, data):
+    """Write `data` to a temporary file next to `path`, then move it into place."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        _replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _replace(tmp, path):
+    """Move `tmp` over `path`, keeping the permissions of the file it replaces."""
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    os.chmod(tmp, mode)
+    os.replace(tmp, path)
+
+
+class OutputWriter:
+    """Write files from a thread pool, replacing only those that changed.
+
+    Used as a context manager; write() queues a file and returns at once,
+    and leaving the block waits for every write, raising the first error.
+    At most `max_pending` writes are queued at a time, so streaming any
+    number of files keeps memory use flat. `changed` lists the paths that
+    were replaced, as their writes complete.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.max_pending = max_pending or 4 * workers
+        self.changed = []
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = deque()
+
+    def write(self, path, text):
+        if len(self._pending) >= self.max_pending:
+            self._collect(self._pending.popleft())
+        self._pending.append((path, self._executor.submit(write_if_changed, path, text)))
+
+    def _collect(self, pending):
+        path, future = pending
+        if future.result():
+            self.changed.append(path)
+
+    def close(self):
+        try:
+            while self._pending:
+                self._collect(self._pending.popleft())
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ChangedFile:
+    """Stream new contents for `path`, replacing it only if they differ.
+
+    Used as a context manager, it yields a UTF-8 text file, which writes
+    newlines as they are, backed by a temporary file next to `path`. On exit
+    the temporary file is compared against `path` and either moved into
+    place or discarded, so arbitrarily large outputs can be written
+    incrementally while keeping unchanged files (and their mtimes) intact.
+    `changed` tells whether `path` was replaced.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.changed = False
+        self._tmp = None
+        self._file = None
+
+    def __enter__(self):
+        directory = os.path.dirname(self.path) or "."
+        fd, self._tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp")
+        self._file = os.fdopen(fd, "w", encoding="utf-8", newline="")
+        return self._file
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is not None or self._unchanged():
+            os.unlink(self._tmp)
+            return False
+        _replace(self._tmp, self.path)
+        self.changed = True
+        return False
+
+    def _unchanged(self):
+        with open(self._tmp, "rb") as f:
+            return file_matches(self.path, iter(lambda: f.read(_CHUNK_SIZE), b""), os.path.getsize(self._tmp))
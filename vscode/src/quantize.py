@@ -0,0 +1,113 @@
+"""Map truecolor colors to the nearest xterm-256 or ANSI-16 color.
+
+For terminals without truecolor support. Distances are measured in OKLab,
+so a color maps to the entry that looks closest rather than the one with
+the nearest RGB channels. Each palette is indexed by a k-d tree over the
+OKLab coordinates of its entries, and lookups are memoized per color, so
+quantizing every color of a large sweep stays cheap.
+
+The 256-color palette uses the 6x6x6 color cube and the gray ramp (indices
+16-255), whose values are fixed; indices 0-15 vary between terminals. The
+16-color palette uses xterm's default values, for picking the closest ANSI
+color name.
+"""
+
+from collections.abc import Mapping
+
+from color import Color
+from oklab import to_oklab
+
+ANSI_NAMES = (
+    "black", "red", "green", "yellow", "blue", "magenta", "cyan", "white",
+    "brblack", "brred", "brgreen", "bryellow", "brblue", "brmagenta", "brcyan", "brwhite",
+)
+ANSI_16 = tuple(Color(value) for value in (
+    "#000000", "#cd0000", "#00cd00", "#cdcd00", "#0000ee", "#cd00cd", "#00cdcd", "#e5e5e5",
+    "#7f7f7f", "#ff0000", "#00ff00", "#ffff00", "#5c5cff", "#ff00ff", "#00ffff", "#ffffff",
+))
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+XTERM_256 = tuple(
+    [Color.from_rgb(r, g, b) for r in _CUBE_LEVELS for g in _CUBE_LEVELS for b in _CUBE_LEVELS]
+    + [Color.from_rgb(level, level, level) for level in range(8, 248, 10)]
+)
+
+# Memoized lookups per palette before the memo is reset
+MAX_CACHED = 1 << 16
+
+
+class Palette:
+    """A terminal palette with nearest-color lookup.
+
+    `first_index` is the terminal color index of the first entry.
+    """
+
+    def __init__(self, colors, first_index=0):
+        self.colors = tuple(colors)
+        self.first_index = first_index
+        self._tree = None
+        self._cache = {}
+
+    def _build(self, points, depth=0):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda point: point[0][axis])
+        middle = len(points) // 2
+        lab, index = points[middle]
+        return (lab, index, axis, self._build(points[:middle], depth + 1), self._build(points[middle + 1:], depth + 1))
+
+    def _search(self, node, target, best):
+        lab, index, axis, left, right = node
+        distance = (lab[0] - target[0]) ** 2 + (lab[1] - target[1]) ** 2 + (lab[2] - target[2]) ** 2
+        if distance < best[0]:
+            best[0], best[1] = distance, index
+        offset = target[axis] - lab[axis]
+        near, far = (left, right) if offset < 0 else (right, left)
+        if near is not None:
+            self._search(near, target, best)
+        # The far side can only hold a closer entry if the splitting plane is closer
+        if far is not None and offset * offset < best[0]:
+            self._search(far, target, best)
+
+    def nearest_index(self, color):
+        """Terminal color index of the entry closest to `color`, ignoring alpha."""
+        index = self._cache.get(color.value)
+        if index is None:
+            if self._tree is None:
+                self._tree = self._build([(to_oklab(entry), i) for i, entry in enumerate(self.colors)])
+            best = [float("inf"), None]
+            self._search(self._tree, to_oklab(color), best)
+            if len(self._cache) >= MAX_CACHED:
+                self._cache.clear()
+            index = self._cache[color.value] = best[1] + self.first_index
+        return index
+
+    def nearest(self, color):
+        """The (opaque) entry closest to `color`."""
+        return self.colors[self.nearest_index(color) - self.first_index]
+
+
+PALETTES = {256: Palette(XTERM_256, first_index=16), 16: Palette(ANSI_16)}
+
+
+def ansi_name(color):
+    """Name of the ANSI color closest to `color`, as fish and most tools spell it."""
+    return ANSI_NAMES[PALETTES[16].nearest_index(color)]
+
+
+class QuantizedColors(Mapping):
+    """Read-only view of a mapping with its Color values quantized to `colors` (256 or 16)."""
+
+    def __init__(self, mapping, colors):
+        self._mapping = mapping
+        self._palette = PALETTES[colors]
+
+    def __getitem__(self, key):
+        value = self._mapping[key]
+        return self._palette.nearest(value) if isinstance(value, Color) else value
+
+    def __iter__(self):
+        return iter(self._mapping)
+
+    def __len__(self):
+        return len(self._mapping)
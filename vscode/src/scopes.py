@@ -0,0 +1,249 @@
+"""Resolve TextMate scopes against a VS Code theme's tokenColors rules.
+
+Follows the editor's theme matching (vscode-textmate): each selector's last
+scope is inserted into a trie keyed by the dot-separated segments of scope
+names, with the scopes before it as parent scopes. Rules are inserted by
+scope name, then in list order, so a node starts from the final rules of
+its parent and a later rule with the same selector overrides an earlier
+one's settings. Looking up a scope stack walks the trie along the innermost
+scope and takes the most specific candidate whose parent scopes match the
+rest of the stack, so it costs time proportional to the scope depth.
+
+Each resolved setting remembers the rule it came from, which also shows
+which rules end up with no effect at all.
+"""
+
+FIELDS = ("foreground", "background", "fontStyle")
+# Memoized scope stack lookups before the memo is reset
+MAX_CACHED = 1 << 16
+
+
+def parse_selectors(scope):
+    """The selectors of a rule's "scope": a list, or a comma-separated string."""
+    if scope is None:
+        return [""]
+    if isinstance(scope, str):
+        scope = scope.strip(",").split(",")
+    return [" ".join(selector.split()) for selector in scope]
+
+
+def matches_scope(scope, selector):
+    """Whether `selector` names `scope` or one of its parents ("string" matches "string.quoted")."""
+    return scope == selector or (scope.startswith(selector) and scope[len(selector):len(selector) + 1] == ".")
+
+
+def matches_parents(stack, parents):
+    """Whether the enclosing scopes `stack` (innermost first) contain `parents` in order.
+
+    A ">" before a parent scope requires it to enclose the previous one directly.
+    """
+    position = 0
+    index = 0
+    while index < len(parents):
+        pattern = parents[index]
+        direct = pattern == ">"
+        if direct:
+            index += 1
+            if index == len(parents):
+                return False
+            pattern = parents[index]
+        while position < len(stack) and not matches_scope(stack[position], pattern):
+            if direct:
+                return False
+            position += 1
+        if position == len(stack):
+            return False
+        position += 1
+        index += 1
+    return True
+
+
+def scope_prefixes(scope):
+    """"string.quoted" -> ["string", "string.quoted"]."""
+    segments = scope.split(".")
+    return [".".join(segments[:i]) for i in range(1, len(segments) + 1)]
+
+
+def specificity(depth, parents):
+    """Sort key of a candidate: deeper scopes first, then more parent scopes, then longer ones."""
+    parents = parents or ()
+    return (depth, len(parents), [len(parent) for parent in parents])
+
+
+class _Node:
+    """The rules inserted at one scope.
+
+    `main` lists the (rule index, settings) of the selectors without parent
+    scopes in insertion order, `scoped` those of each parent scope tuple,
+    and `first_parents` maps the first parent scope to the tuples it starts.
+    """
+
+    __slots__ = ("children", "main", "scoped", "first_parents")
+
+    def __init__(self):
+        self.children = {}
+        self.main = []
+        self.scoped = {}
+        self.first_parents = {}
+
+
+class ScopeResolver:
+    """The tokenColors rules of a theme, compiled for scope lookups.
+
+    `rules` is the "tokenColors" list. Settings are only checked for being
+    strings, so a template's placeholders can be analyzed before rendering.
+
+    The editor copies every rule into the trie nodes below its own, which
+    makes the rules with parent scopes pile up on deep nodes. Here a node
+    only keeps the rules inserted at it: a lookup merges them along the
+    path of the innermost scope, and only considers the parent scope tuples
+    whose first scope encloses it, which gives the same result.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # (rule index, selector) of every selector; rules without a scope set the defaults
+        self.selectors = []
+        for index, rule in enumerate(self.rules):
+            self.selectors += [(index, selector) for selector in parse_selectors(rule.get("scope"))]
+        self._root = _Node()
+        # Selector -> (node, parent scopes) it was inserted at
+        self._inserted = {}
+        self._cache = {}
+        parsed = []
+        for index, selector in self.selectors:
+            segments = selector.split(" ")
+            parents = tuple(reversed(segments[:-1])) or None
+            parsed.append((segments[-1], index, parents, selector))
+        for scope, index, parents, selector in sorted(parsed, key=lambda entry: entry[:2]):
+            node = self._insert(scope, parents, (index, self._settings(index)))
+            self._inserted[index, selector] = (node, parents)
+
+    def _settings(self, index):
+        settings = self.rules[index].get("settings", {})
+        return {field: (settings[field], index) for field in FIELDS if isinstance(settings.get(field), str)}
+
+    def _insert(self, scope, parents, entry):
+        node = self._root
+        for segment in scope.split(".") if scope else ():
+            node = node.children.setdefault(segment, _Node())
+        if parents is None:
+            node.main.append(entry)
+        else:
+            if parents not in node.scoped:
+                node.scoped[parents] = []
+                first = parents[1] if parents[0] == ">" and len(parents) > 1 else parents[0]
+                node.first_parents.setdefault(first, []).append(parents)
+            node.scoped[parents].append(entry)
+        return node
+
+    def _path(self, scope):
+        path = [self._root]
+        for segment in scope.split("."):
+            child = path[-1].children.get(segment)
+            if child is None:
+                break
+            path.append(child)
+        return path
+
+    def _lookup(self, scope, enclosing):
+        path = self._path(scope)
+        # Parent scope tuples that can match: their first scope names an enclosing scope
+        prefixes = {prefix for outer in enclosing for prefix in scope_prefixes(outer)}
+        candidates = {
+            parents
+            for node in path
+            for first in prefixes.intersection(node.first_parents)
+            for parents in node.first_parents[first]
+            if matches_parents(enclosing, parents)
+        }
+
+        # Replay the inserts along the path, as the editor's copies would have merged them
+        main, main_depth = {}, 0
+        elements = {}
+        for depth, node in enumerate(path):
+            # In insertion order, which the editor uses to break ties
+            for parents in sorted(candidates.intersection(node.scoped), key=lambda key: node.scoped[key][0][0]):
+                entries = node.scoped[parents]
+                element = elements.get(parents)
+                if element is None:
+                    # A new selector starts from the main settings at the time of its insert
+                    first_index = entries[0][0]
+                    settings = dict(main)
+                    for index, main_settings in node.main:
+                        if index >= first_index:
+                            break
+                        settings.update(main_settings)
+                    element = elements[parents] = [depth, settings]
+                for _, entry_settings in entries:
+                    element[1].update(entry_settings)
+                element[0] = depth
+            for _, main_settings in node.main:
+                main.update(main_settings)
+            if node.main:
+                main_depth = depth
+
+        best = max(
+            [(specificity(main_depth, None), main)]
+            + [(specificity(depth, parents), settings) for parents, (depth, settings) in elements.items()],
+            key=lambda candidate: candidate[0],
+        )
+        return best[1]
+
+    def resolve(self, stack):
+        """Map each field to (value, rule index) for a scope stack.
+
+        `stack` lists scopes from the outermost in, as a list or a
+        space-separated string: "source.python string.quoted.double.python".
+        """
+        stack = tuple(stack.split() if isinstance(stack, str) else stack)
+        settings = self._cache.get(stack)
+        if settings is None:
+            if stack:
+                settings = self._lookup(stack[-1], stack[-2::-1])
+            else:
+                settings = self._lookup("", ())
+            if len(self._cache) >= MAX_CACHED:
+                self._cache.clear()
+            self._cache[stack] = settings
+        return dict(settings)
+
+    def settings(self, stack):
+        """The settings ("foreground", ...) that apply to a scope stack."""
+        return {field: value for field, (value, _) in self.resolve(stack).items()}
+
+    def dead_selectors(self):
+        """List (rule index, selector, overriding rule indexes) for selectors that color nothing.
+
+        A selector has no effect when its rule sets nothing or when later
+        rules with the same selector override every setting it makes; the
+        overriding rules are then listed. Scopes below it start from the
+        same settings, so it has no effect on them either.
+        """
+        dead = []
+        # (node, parent scopes) -> field -> index of the rule that set it last
+        finals = {}
+        for index, selector in self.selectors:
+            node, parents = self._inserted[index, selector]
+            final = finals.get((id(node), parents))
+            if final is None:
+                final = finals[id(node), parents] = {}
+                for entry_index, settings in node.main if parents is None else node.scoped[parents]:
+                    final.update((field, entry_index) for field in settings)
+            own = self._settings(index)
+            if any(final[field] == index for field in own):
+                continue
+            dead.append((index, selector, sorted({final[field] for field in own})))
+        return dead
+
+
+def format_dead_selector(rules, dead_selector):
+    """One line describing a dead_selectors() entry."""
+    index, selector, overriding = dead_selector
+    name = rules[index].get("name")
+    rule = f"rule {index}" + (f" ({name})" if name else "")
+    target = f"selector {selector!r}" if selector else "default settings"
+    if not overriding:
+        return f"{rule}: {target} sets no colors or font style"
+    others = ", ".join(str(other) for other in overriding)
+    return f"{rule}: {target} is shadowed by rule{'s' if len(overriding) > 1 else ''} {others}"
@@ -0,0 +1,199 @@
+"""Output format plugins.
+
+Each module in this package renders one output format and registers it as
+a Target. Targets are imported on first use, so building one target never
+loads the others. A new format is a module calling register(), listed with
+add_target():
+
+    add_target("kitty", "targets.kitty")
+"""
+
+import importlib
+import importlib.util
+import io
+import os
+import sys
+
+from metadata import PACKAGE_JSON, get_theme_label, theme_filename
+from output import ChangedFile, OutputWriter
+from tracing import run_main, span
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+# Target name -> plugin module, in build order
+_modules = {
+    "vscode": "targets.vscode",
+    "zed": "targets.zed",
+    "ghostty": "targets.ghostty",
+    "fish": "targets.fish",
+}
+_registry = {}
+
+
+class Target:
+    """An output format and where its files go.
+
+    `render(sources, label, template, **options)` returns the text of one
+    theme from the mappings `sources(theme_dict, label)` returns (by
+    default {"theme": theme_dict}); the build records which keys it reads
+    to decide what to rebuild. Each theme is written to `output_dir`, under
+    the repository root, as theme_filename(name) + `suffix`.
+
+    A target with a `bundle` file name instead writes all of its themes into
+    that one file through `write_bundle(f, rendered)`. `extras` maps the ids
+    of additional variants to (base theme index, label, output file name,
+    render options). `fallbacks` maps tags to render options of further
+    files written next to each output, such as reduced-color versions for
+    terminals without truecolor, named by fallback_filename(). A target
+    with `combine` can also write its themes together, as the
+    (output file name, text) pairs `combine(outputs, **options)` makes of
+    all of theirs, e.g. with the values they share factored into one file.
+    `prepare()`, if given, runs before a build writes the target's files, to
+    save inputs it generates in the source tree; rendering never writes.
+    `derive(theme_dicts)`, if given, returns the theme dicts with tokens the
+    target derives computed for all of them at once, which builds of many
+    generated variants use to derive them in bulk.
+    """
+
+    def __init__(self, name, render, output_dir, suffix, template=None, load_template=None,
+                 sources=None, bundle=None, write_bundle=None, extras=None, fallbacks=None, combine=None,
+                 prepare=None, derive=None):
+        self.name = name
+        self.render = render
+        self.output_dir = output_dir
+        self.suffix = suffix
+        self.template = template
+        self._load_template = load_template
+        self._sources = sources
+        self.bundle = bundle
+        self.write_bundle = write_bundle
+        self.extras = extras or {}
+        self.fallbacks = fallbacks or {}
+        self.combine = combine
+        self.prepare = prepare
+        self.derive = derive
+
+    def __repr__(self):
+        return f"Target({self.name!r})"
+
+    def load_template(self, path=None):
+        """Compile the target's template, or the one at `path`; None if it has none."""
+        if self.template is None:
+            return None
+        return self._load_template(path or self.template)
+
+    def sources(self, theme_dict, label):
+        if self._sources is None:
+            return {"theme": theme_dict}
+        return self._sources(theme_dict, label)
+
+    def output_filename(self, name):
+        return theme_filename(name) + self.suffix
+
+    def fallback_filename(self, output_name, tag):
+        """"acme-neo.theme" -> "acme-neo-256.theme"."""
+        root, ext = os.path.splitext(output_name)
+        return f"{root}-{tag}{ext}"
+
+    def render_outputs(self, sources, label, template, output_name, **options):
+        """Yield (output file name, text) for a theme and each of its fallbacks."""
+        yield output_name, self.render(sources, label, template, **options)
+        for tag, fallback_options in self.fallbacks.items():
+            yield self.fallback_filename(output_name, tag), self.render(sources, label, template, **options, **fallback_options)
+
+    def render_file(self, theme_dict, label, template, **options):
+        """The full file text of one theme; a bundle target bundles it alone."""
+        text = self.render(self.sources(theme_dict, label), label, template, **options)
+        if self.bundle is not None:
+            text = self.render_bundle([text])
+        return text
+
+    def render_bundle(self, rendered):
+        buffer = io.StringIO()
+        self.write_bundle(buffer, rendered)
+        return buffer.getvalue()
+
+
+def register(target):
+    """Register a Target; called by each plugin module on import."""
+    _registry[target.name] = target
+    return target
+
+
+def add_target(name, module):
+    """Make a plugin module available as target `name`."""
+    _modules[name] = module
+
+
+def names():
+    """Names of all known targets, without importing them."""
+    return tuple(_modules)
+
+
+def get_target(name):
+    """The Target called `name`, importing its module on first use."""
+    target = _registry.get(name)
+    if target is None:
+        if name not in _modules:
+            raise ValueError(f"unknown target {name!r}")
+        importlib.import_module(_modules[name])
+        target = _registry[name]
+    return target
+
+
+def reload_targets():
+    """Forget the loaded targets, so they are imported afresh on next use.
+
+    Needed after config.py is reloaded, since targets import its colors.
+    """
+    for name in _registry:
+        sys.modules.pop(_modules[name], None)
+    _registry.clear()
+
+
+def source_path(name):
+    """Path of a target's module, without importing it."""
+    return importlib.util.find_spec(_modules[name]).origin
+
+
+def build_target(target, themes):
+    """Render every theme of a target and write the files that changed."""
+    if target.prepare is not None:
+        target.prepare()
+    template = target.load_template()
+    output_dir = os.path.join(ROOT, target.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if target.bundle is not None:
+        def render(theme_dict, label):
+            with span("render"):
+                return target.render(target.sources(theme_dict, label), label, template)
+
+        rendered = (render(theme_dict, get_theme_label(PACKAGE_JSON, theme_dict["name"])) for theme_dict in themes)
+        # Stream to file, one variant at a time
+        with span("write"), ChangedFile(os.path.join(output_dir, target.bundle)) as f:
+            target.write_bundle(f, rendered)
+        print(f"Generated: {target.bundle} with {len(themes)} theme variants")
+        return
+
+    variants = [
+        (theme_dict, get_theme_label(PACKAGE_JSON, theme_dict["name"]), target.output_filename(theme_dict["name"]), {})
+        for theme_dict in themes
+    ]
+    variants += [(themes[index], label, output_name, options) for index, label, output_name, options in target.extras.values()]
+    with OutputWriter() as writer:
+        for theme_dict, label, output_name, options in variants:
+            with span(theme_dict["name"], cat="variant"):
+                sources = target.sources(theme_dict, label)
+                with span("render"):
+                    outputs = list(target.render_outputs(sources, label, template, output_name, **options))
+                for name, text in outputs:
+                    writer.write(os.path.join(output_dir, name), text)
+            for name, _ in outputs:
+                print(f"Generated: {name}")
+
+
+def main(name):
+    """Entry point of a standalone target build script."""
+    from config import themes
+    run_main(lambda: build_target(get_target(name), themes), name)
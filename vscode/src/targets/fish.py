@@ -0,0 +1,186 @@
+"""fish shell color themes."""
+
+import importlib.util
+import json
+import os
+
+from color import parse_palette
+from config import colors, themes
+from manifest import digest_bytes, digest_file
+from output import ChangedFile
+from quantize import QuantizedColors, ansi_name
+from targets import ROOT, Target, register
+
+# Generated highlight colors of the universal theme, kept up to date by
+# save_universal_colors()
+UNIVERSAL_CONFIG = os.path.join(ROOT, "fish", "src", "universal.json")
+# Highlight role -> palette colors it must contrast with, besides the
+# background and foreground of every theme
+UNIVERSAL_ROLES = {
+    "selection_bg": (),
+    # Selected completions are drawn in white
+    "pager_selected_bg": ("white",),
+}
+UNIVERSAL_SEED = "blue_muted"
+# Modules whose code and parameters decide what the optimizer picks
+OPTIMIZER_MODULES = ("optimize", "colorbatch", "oklab", "contrast", "color")
+
+_universal = None
+# UNIVERSAL_CONFIG contents for colors optimized since it was read
+_optimized = None
+
+
+def universal_colors():
+    """The universal theme's highlight colors, re-optimized when the palette changes.
+
+    The colors are read from UNIVERSAL_CONFIG, which records a digest of the
+    colors they were optimized against and of the optimizer's code. When
+    that no longer matches, the optimizer picks new colors, which
+    save_universal_colors() records.
+    Without NumPy the recorded colors are used as they are, or blue_muted if
+    there are none. Never writes any file.
+    """
+    global _universal, _optimized
+    if _universal is not None:
+        return _universal
+
+    targets = {
+        role: [theme_dict[key] for theme_dict in themes for key in ("bg_1", "fg")] + [colors[name] for name in extra]
+        for role, extra in UNIVERSAL_ROLES.items()
+    }
+    inputs = digest_bytes(json.dumps({role: [color.hex for color in c] for role, c in targets.items()}, sort_keys=True),
+                          colors[UNIVERSAL_SEED].hex,
+                          *(digest_file(importlib.util.find_spec(name).origin) for name in OPTIMIZER_MODULES))
+    try:
+        with open(UNIVERSAL_CONFIG, "r") as f:
+            config = json.load(f)
+        recorded = parse_palette({role: config["colors"][role] for role in UNIVERSAL_ROLES})
+    except (OSError, ValueError, KeyError):
+        config, recorded = None, None
+    if recorded is not None and config.get("inputs") == inputs:
+        _universal = recorded
+        return _universal
+
+    try:
+        from optimize import search_color
+    except ImportError:
+        _universal = recorded or {role: colors[UNIVERSAL_SEED] for role in UNIVERSAL_ROLES}
+        return _universal
+
+    results = {role: search_color(c, colors[UNIVERSAL_SEED]) for role, c in targets.items()}
+    _optimized = {
+        "inputs": inputs,
+        "colors": {role: color.hex for role, (color, _) in results.items()},
+        "min_contrast": {role: round(score, 2) for role, (_, score) in results.items()},
+    }
+    _universal = {role: color for role, (color, _) in results.items()}
+    return _universal
+
+
+def save_universal_colors():
+    """Rewrite UNIVERSAL_CONFIG if universal_colors() had to re-optimize; run by the build."""
+    global _optimized
+    universal_colors()
+    if _optimized is None:
+        return
+    with ChangedFile(UNIVERSAL_CONFIG) as f:
+        f.write(json.dumps(_optimized, indent=2) + "\n")
+    print(f"Optimized universal fish colors: {os.path.relpath(UNIVERSAL_CONFIG)}")
+    _optimized = None
+
+
+def render_fish_theme(theme_dict, label, universal=False, palette=colors, highlights=None, quantize_to=None):
+    """Render a fish theme file from a theme dictionary.
+
+    The universal theme takes its highlight colors from `highlights`
+    (default: universal_colors()). With `quantize_to`, colors are replaced
+    by the closest xterm-256 color (256) or ANSI color name (16).
+    """
+    if universal:
+        highlights = highlights or universal_colors()
+    if quantize_to == 256:
+        theme_dict, palette = QuantizedColors(theme_dict, 256), QuantizedColors(palette, 256)
+        highlights = highlights and QuantizedColors(highlights, 256)
+    color_value = ansi_name if quantize_to == 16 else (lambda color: color.rgb_hex)
+
+    # Get base colors
+    bg = color_value(theme_dict.get("bg_1"))
+    fg = color_value(theme_dict.get("fg"))
+    gray = color_value(theme_dict.get("gray"))
+
+    # For comments, use gray (same as Zed, since Fish doesn't support alpha transparency)
+    comment_color = gray
+
+    # For universal theme, use medium-contrast colors that work on both light and dark backgrounds
+    if universal:
+        # Optimized for the highest minimum contrast on both light and dark terminals
+        selection_bg = color_value(highlights["selection_bg"])
+        selected_item_bg = color_value(highlights["pager_selected_bg"])
+        selected_fg = color_value(palette["white"])  # White text on dark backgrounds
+    else:
+        selection_bg = color_value(theme_dict.get("selection_bg"))
+        selected_item_bg = color_value(theme_dict.get("ui_hl"))
+        selected_fg = fg
+
+    # Build the theme file content
+    lines = [
+        f"# {label}",
+        f"# {'Universal' if universal else 'Dark' if theme_dict.get('type') == 'dark' else 'Light'} theme inspired by the Acme editor from Plan 9",
+        "# Generated from VS Code Acme Theme configuration",
+        *([f"# Colors quantized to the {quantize_to}-color terminal palette"] if quantize_to else []),
+        "",
+        "# Syntax Highlighting Colors",
+        f"fish_color_normal {fg}",
+        f"fish_color_command {fg}",
+        f"fish_color_keyword {fg}",
+        f"fish_color_quote {fg}",
+        f"fish_color_redirection {fg}",
+        f"fish_color_end {fg}",
+        f"fish_color_error {color_value(palette['red_1'])}",
+        f"fish_color_param {fg}",
+        f"fish_color_comment {comment_color}",
+        f"fish_color_selection --background={selection_bg}",
+        f"fish_color_operator {fg}",
+        f"fish_color_escape {fg}",
+        f"fish_color_autosuggestion {gray}",
+        "",
+        "# Completion Pager Colors",
+        f"fish_pager_color_progress {gray}",
+        f"fish_pager_color_background",
+        f"fish_pager_color_prefix {fg}",
+        f"fish_pager_color_completion {fg}",
+        f"fish_pager_color_description {gray}",
+        f"fish_pager_color_selected_background --background={selected_item_bg}",
+        f"fish_pager_color_selected_prefix {selected_fg}",
+        f"fish_pager_color_selected_completion {selected_fg}",
+        f"fish_pager_color_selected_description {selected_fg}",
+        f"fish_pager_color_secondary_background",
+        f"fish_pager_color_secondary_prefix {fg}",
+        f"fish_pager_color_secondary_completion {fg}",
+        f"fish_pager_color_secondary_description {gray}",
+        ""
+    ]
+
+    return "\n".join(lines)
+
+
+def theme_sources(theme_dict, label):
+    return {"theme": theme_dict, "colors": colors, "universal": universal_colors()}
+
+
+def render_theme(sources, label, template, universal=False, quantize_to=None):
+    return render_fish_theme(sources["theme"], label, universal, palette=sources["colors"],
+                             highlights=sources["universal"], quantize_to=quantize_to)
+
+
+register(Target(
+    "fish",
+    render_theme,
+    output_dir="fish",
+    suffix="-neo.theme",
+    sources=theme_sources,
+    prepare=save_universal_colors,
+    fallbacks={"256": {"quantize_to": 256}, "16": {"quantize_to": 16}},
+    # The universal theme is based on the first light theme (Acme)
+    extras={"universal": (0, "Acme Neo Universal", "acme-universal-neo.theme", {"universal": True})},
+))
@@ -0,0 +1,80 @@
+"""Ghostty terminal themes."""
+
+from config import colors
+from targets import Target, register
+
+
+def render_ghostty_theme(theme_dict, label, palette=colors):
+    """Render a ghostty theme file from a theme dictionary."""
+    # Get base colors
+    bg = theme_dict.get("bg_1")
+    fg = theme_dict.get("fg").rgb_hex
+    selection_bg = theme_dict.get("selection_bg").rgb_hex
+
+    # Determine palette based on theme type
+    if theme_dict.get("type") == "dark":
+        # Dark theme palette
+        palette_0 = palette["black"]
+        palette_7 = theme_dict.get("bg_3")
+        palette_8 = theme_dict.get("gray")
+        palette_15 = palette["white"]
+    else:
+        # Light theme palette
+        palette_0 = palette["black"]
+        palette_7 = theme_dict.get("bg_3")
+        palette_8 = theme_dict.get("gray")
+        palette_15 = palette["white"]
+
+    # Build the theme file content
+    lines = [
+        f"# {label} - {'Dark' if theme_dict.get('type') == 'dark' else 'Light'} theme inspired by the Acme editor from Plan 9",
+        "# Generated from VS Code Acme Theme configuration",
+        "",
+        f"background = {bg}",
+        f"foreground = {fg}",
+        "",
+        f"cursor-color = {fg}",
+        "cursor-style = block",
+        "cursor-style-blink = false",
+        "",
+        f"selection-background = {selection_bg}",
+        f"selection-foreground = {fg}",
+        "",
+        "# 16-color palette (ANSI colors)",
+        f"palette = 0={palette_0}",
+        f"palette = 1={palette['red_1']}",
+        f"palette = 2={palette['green_1']}",
+        f"palette = 3={palette['yellow_1']}",
+        f"palette = 4={palette['blue_1']}",
+        f"palette = 5={palette['magenta_1']}",
+        f"palette = 6={palette['cyan_1']}",
+        f"palette = 7={palette_7}",
+        f"palette = 8={palette_8}",
+        f"palette = 9={palette['red_2']}",
+        f"palette = 10={palette['green_2']}",
+        f"palette = 11={palette['yellow_2']}",
+        f"palette = 12={palette['blue_2']}",
+        f"palette = 13={palette['magenta_2']}",
+        f"palette = 14={palette['cyan_2']}",
+        f"palette = 15={palette_15}",
+        ""
+    ]
+
+    return "\n".join(lines)
+
+
+def theme_sources(theme_dict, label):
+    return {"theme": theme_dict, "colors": colors}
+
+
+def render_theme(sources, label, template):
+    return render_ghostty_theme(sources["theme"], label, palette=sources["colors"])
+
+
+register(Target(
+    "ghostty",
+    render_theme,
+    output_dir="ghostty",
+    suffix="-neo",
+    sources=theme_sources,
+))
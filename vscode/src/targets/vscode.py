@@ -0,0 +1,130 @@
+"""VS Code color themes, rendered from src/template.json.
+
+Themes can also be written as base themes holding the values themes
+share, which each theme then pulls in through the "include" field and
+extends with its own values; see combine_themes().
+"""
+
+import json
+import os
+
+from targets import ROOT, Target, register
+from template import load_template
+
+# Shared values of all themes, and of the themes of one type ("light", "dark")
+BASE_FILENAME = "base-color-theme.json"
+TYPE_BASE_FILENAME = "base-{type}-color-theme.json"
+# Keys the editor merges from an included theme rather than replacing
+MERGED_KEYS = ("colors", "semanticTokenColors")
+
+
+def render_theme(sources, label, template):
+    """Render a color-theme JSON file from a theme dictionary."""
+    return template.render(sources["theme"])
+
+
+def serialize(theme, minify=False):
+    if minify:
+        return json.dumps(theme, separators=(",", ":"))
+    return json.dumps(theme, indent=2)
+
+
+def _shared_items(mappings):
+    """Items with the same value in every mapping, in the first mapping's order."""
+    first, rest = mappings[0], mappings[1:]
+    return {key: value for key, value in first.items() if all(key in other and other[key] == value for other in rest)}
+
+
+def _common_prefix(lists):
+    length = 0
+    for items in zip(*lists):
+        if any(item != items[0] for item in items[1:]):
+            break
+        length += 1
+    return lists[0][:length]
+
+
+def split_themes(themes, base_filename=BASE_FILENAME):
+    """Factor parsed themes into (base theme, per-theme deltas including it).
+
+    Included themes are loaded first: "colors" and "semanticTokenColors"
+    are merged key by key with the including theme's values winning, and
+    "tokenColors" rules are prepended to its own. So the base gets the color
+    entries all themes share, the leading tokenColors rules they share, and
+    any other field they share; each delta keeps the rest.
+    """
+    base = {}
+    for key, value in _shared_items(themes).items():
+        if key not in MERGED_KEYS and key not in ("name", "tokenColors"):
+            base[key] = value
+    for key in MERGED_KEYS:
+        if all(isinstance(theme.get(key), dict) for theme in themes):
+            shared = _shared_items([theme[key] for theme in themes])
+            if shared:
+                base[key] = shared
+    if all(isinstance(theme.get("tokenColors"), list) for theme in themes):
+        prefix = _common_prefix([theme["tokenColors"] for theme in themes])
+        if prefix:
+            base["tokenColors"] = prefix
+
+    deltas = []
+    for theme in themes:
+        delta = {"name": theme["name"]} if "name" in theme else {}
+        delta["include"] = f"./{base_filename}"
+        for key, value in theme.items():
+            if key == "name":
+                continue
+            if key not in base:
+                delta[key] = value
+            elif key in MERGED_KEYS:
+                own = {name: color for name, color in value.items() if name not in base[key]}
+                if own:
+                    delta[key] = own
+            elif key == "tokenColors":
+                own = value[len(base[key]):]
+                if own:
+                    delta[key] = own
+        deltas.append(delta)
+    return base, deltas
+
+
+def combine_themes(outputs, include=True, minify=False):
+    """Rewrite the (output file name, text) pairs of every theme.
+
+    With `include`, the values all themes share are written once to
+    BASE_FILENAME. When themes of more than one type are built, the values
+    the themes of a type share on top of those go to a base of that type,
+    which includes the first. Each theme keeps only its own values and
+    includes its base. With `minify`, themes are serialized without
+    whitespace.
+    """
+    themes = {name: json.loads(text) for name, text in outputs}
+    if not include or not themes:
+        return [(name, serialize(theme, minify)) for name, theme in themes.items()]
+
+    base, deltas = split_themes(list(themes.values()))
+    files = {BASE_FILENAME: base}
+    by_type = {}
+    for name, theme in themes.items():
+        by_type.setdefault(theme.get("type"), []).append(name)
+    themes = dict(zip(themes, deltas))
+    if len(by_type) > 1:
+        for theme_type, names in by_type.items():
+            if theme_type is None or len(names) < 2:
+                continue
+            type_filename = TYPE_BASE_FILENAME.format(type=theme_type)
+            files[type_filename], deltas = split_themes([themes[name] for name in names], type_filename)
+            themes.update(zip(names, deltas))
+    files.update(themes)
+    return [(name, serialize(theme, minify)) for name, theme in files.items()]
+
+
+register(Target(
+    "vscode",
+    render_theme,
+    output_dir="vscode/themes",
+    suffix="-color-theme.json",
+    template=os.path.join(ROOT, "vscode", "src", "template.json"),
+    load_template=load_template,
+    combine=combine_themes,
+))
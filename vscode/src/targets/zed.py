@@ -0,0 +1,175 @@
+"""Zed theme family, rendered from zed/src/template.json."""
+
+import json
+import os
+from collections import ChainMap
+
+from config import colors
+from oklab import darken, lighten
+from targets import ROOT, Target, register
+from template import compile_template, format_path
+from tokens import TokenGraph, updated
+from tracing import span
+
+
+# Zed-specific tokens, derived from the shared theme tokens
+zed_tokens = TokenGraph()
+
+
+@zed_tokens.token("type")
+def appearance(type):
+    return "dark" if type == "dark" else "light"
+
+
+# Borders - use bg_2 for dark themes, border_1 for light themes
+@zed_tokens.token("type", "bg_2", "border_1")
+def border(type, bg_2, border_1):
+    return bg_2 if type == "dark" else border_1
+
+
+@zed_tokens.token("blue_1")
+def border_focused(blue_1):
+    return blue_1
+
+
+# Hints - use bg_3 for dark themes for more contrast, bg_2 for light themes
+@zed_tokens.token("type", "bg_2", "bg_3")
+def hint_bg(type, bg_2, bg_3):
+    return bg_3 if type == "dark" else bg_2
+
+
+# Scrollbar colors; hover and active shades step the lightness of gray in OKLab
+@zed_tokens.token("gray")
+def scrollbar_thumb(gray):
+    return gray
+
+
+@zed_tokens.token("type", "gray")
+def scrollbar_hover(type, gray):
+    return lighten(gray) if type == "dark" else darken(gray)
+
+
+@zed_tokens.token("type", "gray")
+def scrollbar_active(type, gray):
+    return lighten(gray, 0.2) if type == "dark" else darken(gray, 0.2)
+
+
+def derive_scrollbar_shades(theme_dicts):
+    """The theme dicts with their scrollbar shades derived in bulk, as base tokens.
+
+    Base tokens take precedence over the rules above, which give the same
+    colors one theme at a time. Without NumPy the theme dicts are returned
+    as they are.
+    """
+    try:
+        from colorbatch import derive_shades
+    except ImportError:
+        return theme_dicts
+    hover = derive_shades(theme_dicts, "gray")
+    active = derive_shades(theme_dicts, "gray", 0.2)
+    return [
+        updated(theme_dict, {"scrollbar_hover": hover_color, "scrollbar_active": active_color})
+        for theme_dict, hover_color, active_color in zip(theme_dicts, hover, active)
+    ]
+
+
+# ANSI colors
+@zed_tokens.token("gray")
+def ansi_bright_black(gray):
+    return gray
+
+
+@zed_tokens.token("bg_3")
+def ansi_white(bg_3):
+    return bg_3
+
+
+zed_tokens.constant("border_transparent", colors["invisible"])
+zed_tokens.constant("ansi_black", colors["black"])
+zed_tokens.constant("ansi_bright_white", colors["white"])
+
+# Standard colors always come from the shared palette, over the theme's own
+STANDARD_COLORS = (
+    "red_1", "red_2", "green_1", "green_2", "yellow_1", "yellow_2", "blue_1", "blue_2",
+    "cyan_1", "cyan_2", "magenta_1", "magenta_2", "orange_1",
+)
+standard_colors = {key: colors[key] for key in STANDARD_COLORS}
+
+
+def prepare_theme_dict(theme_dict):
+    """Prepare a theme dictionary with all required Zed colors.
+
+    The Zed tokens are derived lazily, as the template reads them.
+    """
+    return zed_tokens.resolve(ChainMap(standard_colors, theme_dict))
+
+
+ZED_HEADER = {"name": "Acme Neo", "author": "mariusae"}
+ZED_SCHEMA = "https://zed.dev/schema/themes/v0.2.0.json"
+
+
+def load_variant_template(template_path):
+    """Compile the single variant of the Zed template.
+
+    Variants are nested two levels deep in the output, so the template is
+    compiled with that indentation.
+    """
+    with open(template_path, "r") as f:
+        template = json.load(f)
+    return compile_template(template["themes"][0], level=2)
+
+
+def prepare_variant_dict(theme_dict, label):
+    """Prepare the dictionary a Zed variant is rendered from."""
+    with span("prepare_theme_dict"):
+        return prepare_theme_dict(ChainMap({"label": label}, theme_dict))
+
+
+def render_zed_variant(variant_template, zed_dict):
+    """Render one Zed theme variant as JSON text."""
+    name = zed_dict.get("name")
+
+    def missing(key, paths):
+        print(f"Warning: Missing key {key!r} for theme {name} at {', '.join(format_path(path) for path in paths)}")
+
+    return variant_template.render(zed_dict, missing)
+
+
+def write_zed_bundle(f, variants):
+    """Stream the Zed theme family JSON to `f`, one rendered variant at a time.
+
+    `variants` may be a generator; only one variant is held at a time.
+    """
+    for i, (key, value) in enumerate(ZED_HEADER.items()):
+        f.write("{\n  " if i == 0 else ",\n  ")
+        f.write(f"{json.dumps(key)}: {json.dumps(value)}")
+    f.write(',\n  "themes": [' if ZED_HEADER else '{\n  "themes": [')
+    count = 0
+    for count, variant in enumerate(variants, 1):
+        f.write("\n    " if count == 1 else ",\n    ")
+        f.write(variant)
+    f.write("\n  ]" if count else "]")
+    f.write(f',\n  "$schema": {json.dumps(ZED_SCHEMA)}\n}}')
+    return count
+
+
+def theme_sources(theme_dict, label):
+    return {"theme": prepare_variant_dict(theme_dict, label)}
+
+
+def render_theme(sources, label, template):
+    return render_zed_variant(template, sources["theme"])
+
+
+register(Target(
+    "zed",
+    render_theme,
+    output_dir="zed",
+    suffix=".json",
+    template=os.path.join(ROOT, "zed", "src", "template.json"),
+    load_template=load_variant_template,
+    sources=theme_sources,
+    bundle="acme-neo.json",
+    write_bundle=write_zed_bundle,
+    derive=derive_scrollbar_shades,
+))
@@ -0,0 +1,178 @@
+import json
+import re
+import string
+from json.encoder import encode_basestring_ascii
+
+# Placeholder strings are swapped for numbered sentinels before the template
+# is serialized once; the serialized text is then split around them.
+_SENTINEL = "\x00slot{}\x00"
+_SENTINEL_PATTERN = re.compile(r'\\u0000slot(\d+)\\u0000')
+
+
+def _escape(value):
+    """JSON-escape a string without the surrounding quotes."""
+    return encode_basestring_ascii(value)[1:-1]
+
+
+def _format_field(value, conversion, spec):
+    if conversion == "s":
+        value = str(value)
+    elif conversion == "r":
+        value = repr(value)
+    elif conversion == "a":
+        value = ascii(value)
+    return format(value, spec)
+
+
+def format_path(path):
+    """A JSON path as a "/"-separated string, like a JSON pointer."""
+    return "/" + "/".join(str(part) for part in path)
+
+
+class MissingKeysError(KeyError):
+    """Placeholder keys missing from the values a template is rendered with.
+
+    `missing` maps each missing key to the JSON paths where it occurs.
+    """
+
+    def __init__(self, missing):
+        super().__init__(*sorted(missing))
+        self.missing = missing
+
+    def __str__(self):
+        return "; ".join(
+            f"{key!r} at {', '.join(format_path(path) for path in paths)}"
+            for key, paths in sorted(self.missing.items())
+        )
+
+
+def parse_format_string(value):
+    """Split a format string into literal strings and (key, conversion, spec) fields."""
+    segments = []
+    for literal, key, spec, conversion in string.Formatter().parse(value):
+        if literal:
+            segments.append(literal)
+        if key is None:
+            continue
+        if not key or not key.isidentifier():
+            raise ValueError(f"Unsupported placeholder {{{key}}} in {value!r}")
+        if "{" in spec:
+            raise ValueError(f"Nested format spec in {value!r} is not supported")
+        segments.append((key, conversion, spec))
+    return tuple(segments)
+
+
+class CompiledTemplate:
+    """A JSON template parsed once into a flat plan of placeholder strings.
+
+    `plan` lists every string that contains placeholders as a
+    (JSON path, segments) pair, in document order. Rendering fills the slots
+    of a pre-serialized skeleton, so it costs time proportional to the number
+    of placeholders rather than the size of the template. `keys` is the set
+    of placeholder keys and `paths` maps each key to the JSON paths where it
+    occurs, so values can be checked against the template before rendering.
+    """
+
+    def __init__(self, template, indent=2, level=0):
+        self.plan = []
+        self._raw = []
+        skeleton = self._compile(template, ())
+
+        text = json.dumps(skeleton, indent=indent)
+        if indent is not None and level:
+            text = text.replace("\n", "\n" + " " * (indent * level))
+
+        parts = _SENTINEL_PATTERN.split(text)
+        self._chunks = parts[0::2]
+        order = [int(index) for index in parts[1::2]]
+        if order != list(range(len(self.plan))):
+            raise ValueError("Template placeholders could not be located")
+
+        self._leaves = [
+            tuple(
+                _escape(segment) if isinstance(segment, str) else segment
+                for segment in segments
+            )
+            for _, segments in self.plan
+        ]
+        self._slots = {}
+        for i, (_, segments) in enumerate(self.plan):
+            for segment in segments:
+                if not isinstance(segment, str):
+                    self._slots.setdefault(segment[0], []).append(i)
+        self.keys = frozenset(self._slots)
+        self.paths = {
+            key: tuple(dict.fromkeys(self.plan[i][0] for i in slots))
+            for key, slots in self._slots.items()
+        }
+
+    def _compile(self, value, path):
+        if isinstance(value, str):
+            if "\x00" in value:
+                raise ValueError(f"NUL character in template string at {path}")
+            segments = parse_format_string(value)
+            if all(isinstance(segment, str) for segment in segments):
+                return "".join(segments)
+            self.plan.append((path, segments))
+            self._raw.append(value)
+            return _SENTINEL.format(len(self.plan) - 1)
+        elif isinstance(value, list):
+            return [self._compile(item, path + (i,)) for i, item in enumerate(value)]
+        elif isinstance(value, dict):
+            return {key: self._compile(val, path + (key,)) for key, val in value.items()}
+        else:
+            return value
+
+    def missing_keys(self, values):
+        """Map each placeholder key not in `values` to the JSON paths where it occurs."""
+        return {key: self.paths[key] for key in self.keys - values.keys()}
+
+    def validate(self, values):
+        """Raise MissingKeysError listing every placeholder key not in `values`."""
+        missing = self.missing_keys(values)
+        if missing:
+            raise MissingKeysError(missing)
+
+    def render(self, values, missing=None):
+        """Render the template as JSON text using `values` for the placeholders.
+
+        `values` is checked against the template's keys before rendering.
+        Missing keys raise MissingKeysError, unless `missing` is given: it is
+        then called with each missing key and its JSON paths, and the strings
+        using those keys are left unformatted.
+        """
+        absent = self.missing_keys(values)
+        skip = ()
+        if absent:
+            if missing is None:
+                raise MissingKeysError(absent)
+            for key, paths in sorted(absent.items()):
+                missing(key, paths)
+            skip = {i for key in absent for i in self._slots[key]}
+
+        chunks = self._chunks
+        out = [chunks[0]]
+        append = out.append
+        for i, leaf in enumerate(self._leaves):
+            if i in skip:
+                append(_escape(self._raw[i]))
+            else:
+                for segment in leaf:
+                    if isinstance(segment, str):
+                        append(segment)
+                    else:
+                        key, conversion, spec = segment
+                        append(_escape(_format_field(values[key], conversion, spec)))
+            append(chunks[i + 1])
+        return "".join(out)
+
+
+def compile_template(template, indent=2, level=0):
+    """Compile a parsed JSON template; `level` indents it for nesting."""
+    return CompiledTemplate(template, indent, level)
+
+
+def load_template(template_file, indent=2, level=0):
+    """Read and compile a JSON template file."""
+    with open(template_file, "r") as f:
+        return compile_template(json.load(f), indent, level)
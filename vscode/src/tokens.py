@@ -0,0 +1,164 @@
+"""Derived theme tokens, declared once and resolved lazily.
+
+A TokenGraph holds rules deriving tokens from other tokens:
+
+    derived = TokenGraph()
+
+    @derived.token("fg")
+    def fg_dim(fg):
+        return fg.with_alpha(0x78)
+
+graph.resolve(base) wraps a theme's base tokens in a read-only Tokens
+mapping. A derived token is computed from its inputs, base or derived, the
+first time it is read and memoized on that mapping, so a target only pays
+for the tokens its template references. A base value takes precedence over
+the rule of the same name. Graphs are layered by resolving one over the
+Tokens of another, as the Zed builder does over the themes in config.py.
+"""
+
+from collections.abc import ItemsView, KeysView, Mapping, ValuesView
+
+
+class TokenGraph:
+    """Rules deriving tokens from other tokens."""
+
+    def __init__(self):
+        self.rules = {}
+        self._dependents = None
+
+    def token(self, *inputs):
+        """Decorator declaring a token named after the function, computed from `inputs`."""
+        def register(fn):
+            self.add(fn.__name__, inputs, fn)
+            return fn
+        return register
+
+    def add(self, name, inputs, fn):
+        self.rules[name] = (tuple(inputs), fn)
+        self._dependents = None
+
+    def constant(self, name, value):
+        self.add(name, (), lambda: value)
+
+    def __contains__(self, name):
+        return name in self.rules
+
+    def dependents(self, names):
+        """The derived tokens computed from any of the tokens `names`, directly or not."""
+        if self._dependents is None:
+            self._dependents = {}
+            for name, (inputs, _) in self.rules.items():
+                for input_name in inputs:
+                    self._dependents.setdefault(input_name, set()).add(name)
+        found = set()
+        pending = list(names)
+        while pending:
+            for name in self._dependents.get(pending.pop(), ()):
+                if name not in found:
+                    found.add(name)
+                    pending.append(name)
+        return found
+
+    def resolve(self, base):
+        return Tokens(self, base)
+
+
+class Tokens(dict):
+    """A theme's base tokens plus the tokens derived from them, memoized.
+
+    Behaves as a read-only mapping of every base and derived token. Values
+    are memoized in the dict itself as they are read, so repeated lookups,
+    such as rendering a template for the same theme again, run at plain dict
+    speed.
+    """
+
+    def __init__(self, graph, base, cache=None):
+        super().__init__(cache or ())
+        self.graph = graph
+        self.base = base
+
+    def __missing__(self, name):
+        return self._resolve(name, ())
+
+    def _resolve(self, name, chain):
+        """The value of `name`, read for the derived tokens in `chain`."""
+        if dict.__contains__(self, name):
+            return dict.__getitem__(self, name)
+        rule = self.graph.rules.get(name)
+        if rule is None or name in self.base:
+            value = self.base[name]
+        elif name in chain:
+            raise ValueError(f"Derived tokens depend on themselves: {' -> '.join(chain + (name,))}")
+        else:
+            inputs, fn = rule
+            chain += (name,)
+            value = fn(*(self._resolve(input_name, chain) for input_name in inputs))
+        dict.__setitem__(self, name, value)
+        return value
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __contains__(self, name):
+        return self._has(name, ())
+
+    def _has(self, name, chain):
+        if dict.__contains__(self, name) or name in self.base:
+            return True
+        rule = self.graph.rules.get(name)
+        if rule is None or name in chain:
+            return False
+        # A derived token exists only if all of its inputs do
+        chain += (name,)
+        return all(self._has(input_name, chain) for input_name in rule[0])
+
+    def __iter__(self):
+        yield from self.base
+        for name in self.graph.rules:
+            if name not in self.base and name in self:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def keys(self):
+        return KeysView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    __eq__ = Mapping.__eq__
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Tokens({self.base!r})"
+
+    def __setitem__(self, name, value):
+        raise TypeError("Tokens are read-only; use replace()")
+
+    def __reduce__(self):
+        return Tokens, (self.graph, self.base, dict(dict.items(self)))
+
+    def replace(self, changes):
+        """A copy with the tokens in `changes` replaced.
+
+        A derived token in `changes` becomes a base value, which overrides
+        its rule. Memoized tokens are carried over unless they depend on a
+        change.
+        """
+        stale = self.graph.dependents(changes) | set(changes)
+        cache = {name: value for name, value in dict.items(self) if name not in stale}
+        return Tokens(self.graph, {**self.base, **changes}, cache)
+
+
+def updated(theme_dict, changes):
+    """Copy a theme dict with `changes` applied, keeping derived tokens lazy."""
+    if isinstance(theme_dict, Tokens):
+        return theme_dict.replace(changes)
+    return {**theme_dict, **changes}
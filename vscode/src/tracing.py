@@ -0,0 +1,111 @@
+"""Opt-in build tracing and profiling.
+
+Spans are recorded as Chrome trace events ("X" complete events), viewable in
+chrome://tracing or https://ui.perfetto.dev. Tracing is off by default, in
+which case span() returns a shared no-op context manager.
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+_NULL_SPAN = nullcontext()
+_events = None
+# Process that recorded _events; a forked worker inherits them
+_pid = None
+_lock = threading.Lock()
+
+
+def enable():
+    """Start recording spans in this process.
+
+    A worker forked from a tracing process starts with an empty buffer, so
+    the spans it reports are only its own and none are merged twice.
+    """
+    global _events, _pid
+    if _events is None or _pid != os.getpid():
+        _events = []
+        _pid = os.getpid()
+
+
+def enabled():
+    return _events is not None
+
+
+@contextmanager
+def _span(name, cat, args):
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": started / 1000,
+            "dur": (time.perf_counter_ns() - started) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+        }
+        if args:
+            event["args"] = args
+        with _lock:
+            _events.append(event)
+
+
+def span(name, cat="stage", **args):
+    """Context manager recording a span, if tracing is enabled."""
+    if _events is None:
+        return _NULL_SPAN
+    return _span(name, cat, args)
+
+
+def drain():
+    """Return and clear the events recorded so far."""
+    global _events
+    if _events is None:
+        return []
+    with _lock:
+        events, _events = _events, []
+    return events
+
+
+def write_trace(path, events):
+    """Write events as a Chrome trace file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def add_arguments(parser, profile_default, trace_default):
+    parser.add_argument("--profile", nargs="?", const=profile_default, metavar="FILE",
+                        help=f"write a cProfile dump (default: {profile_default})")
+    parser.add_argument("--trace", nargs="?", const=trace_default, metavar="FILE",
+                        help=f"write a Chrome trace timeline (default: {trace_default})")
+
+
+def run_main(main, name):
+    """Run a builder's main() with --profile / --trace support."""
+    parser = argparse.ArgumentParser()
+    add_arguments(parser, f"{name}.prof", f"{name}-trace.json")
+    args = parser.parse_args()
+
+    if args.trace:
+        enable()
+    profile = cProfile.Profile() if args.profile else None
+    with span(name, cat="target"):
+        if profile is not None:
+            profile.runcall(main)
+        else:
+            main()
+
+    if profile is not None:
+        profile.dump_stats(args.profile)
+        print(f"Profile: {args.profile}")
+    if args.trace:
+        write_trace(args.trace, drain())
+        print(f"Trace: {args.trace}")
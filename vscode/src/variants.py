@@ -0,0 +1,92 @@
+"""Derive theme variants from a base theme by sweeping parameters.
+
+Variants are produced lazily, one theme dict at a time, so a sweep of any
+size can be streamed to disk in constant memory.
+"""
+
+from itertools import product
+
+from color import Color
+from oklab import mix, rotate_hue
+from tokens import Tokens, updated
+
+BACKGROUND_KEYS = ("bg_1", "bg_2", "bg_3")
+
+
+def scale_contrast(color, background, factor):
+    """Scale the OKLab distance of a color from `background` by `factor`, keeping its alpha."""
+    if factor == 1:
+        return color
+    return mix(background, color, factor).with_alpha(color.alpha)
+
+
+def map_colors(theme_dict, fn, skip=()):
+    """Copy a theme dict, applying `fn` to every Color value not in `skip`.
+
+    Only the base tokens of a Tokens mapping are mapped; its derived tokens
+    are then derived from the mapped colors.
+    """
+    if isinstance(theme_dict, Tokens):
+        return theme_dict.graph.resolve(map_colors(theme_dict.base, fn, skip))
+    return {
+        key: fn(value) if isinstance(value, Color) and key not in skip else value
+        for key, value in theme_dict.items()
+    }
+
+
+def hue_rotated(theme_dict, degrees):
+    return map_colors(theme_dict, lambda color: rotate_hue(color, degrees))
+
+
+def contrast_scaled(theme_dict, factor):
+    """Scale the contrast of every color against the theme's bg_1."""
+    background = theme_dict["bg_1"]
+    return map_colors(theme_dict, lambda color: scale_contrast(color, background, factor), skip=BACKGROUND_KEYS)
+
+
+def with_backgrounds(theme_dict, backgrounds):
+    """Swap in new bg_1, bg_2 and bg_3 colors."""
+    return updated(theme_dict, dict(zip(BACKGROUND_KEYS, (Color.parse(bg) for bg in backgrounds))))
+
+
+def variant_name(base_name, hue, contrast, background_index):
+    parts = [base_name]
+    if hue:
+        parts.append(f"Hue {hue:g}")
+    if contrast != 1:
+        parts.append(f"Contrast {contrast:g}")
+    if background_index is not None:
+        parts.append(f"Background {background_index}")
+    return " ".join(parts)
+
+
+def sweep(base, hues=(0,), contrasts=(1.0,), backgrounds=(None,)):
+    """Lazily yield one theme dict per combination of the parameters.
+
+    `backgrounds` entries are (bg_1, bg_2, bg_3) triples, or None to keep the
+    base theme's backgrounds. Backgrounds are swapped first, then hues are
+    rotated, then contrast is scaled.
+    """
+    for hue, contrast, (background_index, backgrounds_) in product(
+        hues, contrasts, enumerate(backgrounds)
+    ):
+        theme_dict = base
+        if backgrounds_ is not None:
+            theme_dict = with_backgrounds(theme_dict, backgrounds_)
+        else:
+            background_index = None
+        theme_dict = contrast_scaled(hue_rotated(theme_dict, hue), contrast)
+        yield updated(theme_dict, {"name": variant_name(base["name"], hue, contrast, background_index)})
+
+
+def parse_range(text, convert=float):
+    """Parse "start:stop:step" (stop exclusive) or "a,b,c" into a list of values."""
+    if ":" not in text:
+        return [convert(value) for value in text.split(",")]
+    start, stop, step = (convert(value) for value in text.split(":"))
+    if step <= 0:
+        raise ValueError(f"Range step must be positive: {text!r}")
+    values = []
+    while start + len(values) * step < stop - 1e-9:
+        values.append(start + len(values) * step)
+    return values
@@ -0,0 +1,125 @@
+"""Wait for changes to a set of files.
+
+Uses inotify on Linux and falls back to polling file stats elsewhere. Both
+watchers expose wait(), which blocks until at least one watched file has
+changed and returns the set of changed paths. When inotify drops events
+because its queue overflowed, every watched path is returned, so that the
+caller rebuilds everything.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct("iIII")
+
+# Events arriving within this window of the first one are reported together
+SETTLE_TIME = 0.005
+
+
+class PollingWatcher:
+    """Watch files by polling their size and mtime."""
+
+    def __init__(self, paths, interval=0.02):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self._stamps = {path: self._stamp(path) for path in self.paths}
+
+    @staticmethod
+    def _stamp(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def wait(self):
+        while True:
+            changed = set()
+            for path in self.paths:
+                stamp = self._stamp(path)
+                if stamp != self._stamps[path]:
+                    self._stamps[path] = stamp
+                    changed.add(path)
+            if changed:
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Watch files through inotify on their parent directories.
+
+    Watching directories rather than the files themselves keeps working when
+    editors save by writing a new file and renaming it into place.
+    """
+
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.paths = {os.path.abspath(path) for path in paths}
+        self._fd = libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        for directory in sorted({os.path.dirname(path) for path in self.paths}):
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._dirs[wd] = directory
+
+    def _read(self):
+        changed = set()
+        data = os.read(self._fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost (wd is -1): any file may have changed
+                changed |= self.paths
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def wait(self):
+        while True:
+            select.select([self._fd], [], [])
+            changed = self._read()
+            if not changed:
+                continue
+            # Let bursts of events from a single save settle
+            while select.select([self._fd], [], [], SETTLE_TIME)[0]:
+                changed |= self._read()
+            return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def file_watcher(paths, interval=0.02):
+    """An inotify watcher where available, otherwise a polling one."""
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError):
+        return PollingWatcher(paths, interval)